@@ -1,63 +1,122 @@
 import os
+import logging
 from flask import Flask
 from datetime import timedelta
-from flask_migrate import Migrate
 from flask_restful import Api
 from flask_jwt_extended import JWTManager
-from flask_bcrypt import Bcrypt
 from flask_cors import CORS
+from werkzeug.middleware.proxy_fix import ProxyFix
 from dotenv import load_dotenv
-import cloudinary
 
-from models.baseModel import db
+from models.baseModel import db, bcrypt
+from dbpool import engine_options
+import metrics
 from resources.loginResource import LoginResource
 from resources.signupResource import SignupResource
 from resources.recordResource import RecordResource
+from resources.clusterResource import ClusterResource
+from resources.streamResource import RecordStreamResource, StreamTokenResource, stream_token_allowed
+from resources.bulkResource import BulkRecordResource, BulkStatusResource
 from resources.adminResource import AdminResource
+from resources.exportResource import ExportResource
+from resources.statsResource import StatsResource
+from resources.rateLimitResource import RateLimitResource
+from resources.poolResource import PoolResource
+from resources.auditResource import RecordTimelineResource, ResolutionTimeResource
+from resources.notificationResource import (
+    NotificationResource, NotificationReadResource, UnreadCountResource,
+)
 
 # Load environment variables
 load_dotenv()
 
-# Initialize Flask app
-app = Flask(__name__)
-api = Api(app)
+jwt = JWTManager()
+jwt.token_verification_loader(stream_token_allowed)
 
-# Configure JWT
-app.config["JWT_SECRET_KEY"] = os.environ.get("JWT_SECRET")
-app.config["JWT_ACCESS_TOKEN_EXPIRES"] = timedelta(hours=24)
 
-jwt = JWTManager(app)
+def create_app(config=None):
+    """Build the Flask app. `config` overrides the settings read from the environment."""
+    # INFO and up from the app's modules (outbox worker progress, uploads, events);
+    # a no-op when the root logger already has handlers
+    logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO").upper())
 
+    app = Flask(__name__)
 
-# Configure Cloudinary
-cloudinary.config(
-    cloud_name=os.getenv('CLOUDINARY_CLOUD_NAME'),
-    api_key=os.getenv('CLOUDINARY_API_KEY'),
-    api_secret=os.getenv('CLOUDINARY_API_SECRET')
-)
+    # Configure JWT
+    app.config["JWT_SECRET_KEY"] = os.environ.get("JWT_SECRET")
+    app.config["JWT_ACCESS_TOKEN_EXPIRES"] = timedelta(hours=24)
+
+    # Configure DB
+    app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL")
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+
+    # Password hashing cost, hashes with another cost are upgraded at login
+    app.config["BCRYPT_LOG_ROUNDS"] = int(os.environ.get("BCRYPT_LOG_ROUNDS", 12))
+
+    app.config.update(config or {})
+    app.config.setdefault("SQLALCHEMY_ENGINE_OPTIONS", engine_options(app.config["SQLALCHEMY_DATABASE_URI"]))
+
+    # Cloudinary is configured by uploads.CloudinaryStorage on the first upload;
+    # migrations and CLI commands live in cli.py
+
+    db.init_app(app)
+    jwt.init_app(app)
+    bcrypt.init_app(app)
+    CORS(app, resources={r"/*": {"origins": "*"}})
+    # Request/SQL timings and GET /metrics
+    metrics.init_app(app, db)
+
+    # Behind a proxy (e.g. Render) set TRUSTED_PROXIES so request.remote_addr, used
+    # by the login rate limiter, is the client address from X-Forwarded-For
+    if os.environ.get("TRUSTED_PROXIES"):
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=int(os.environ["TRUSTED_PROXIES"]))
+
+    register_resources(Api(app))
+    return app
+
+
+def register_resources(api):
+    # Auth routes
+    api.add_resource(SignupResource, "/signup")
+    api.add_resource(LoginResource, "/login","/profile")
+
+    # User routes
+    api.add_resource(RecordResource, "/records", "/records/<int:record_id>")
+    api.add_resource(ClusterResource, "/records/clusters/<int:z>/<int:x>/<int:y>")
+    api.add_resource(RecordStreamResource, "/records/stream")
+    api.add_resource(StreamTokenResource, "/records/stream/token")
+    api.add_resource(BulkRecordResource, "/records/bulk")
+    api.add_resource(RecordTimelineResource, "/records/<int:record_id>/events")
+    api.add_resource(NotificationResource, "/notifications")
+    api.add_resource(UnreadCountResource, "/notifications/unread-count")
+    api.add_resource(NotificationReadResource, "/notifications/read")
 
-# Configure DB
-app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL")
-app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 
-db.init_app(app)
-migrate = Migrate(app, db)
+    # Admin routes
+    api.add_resource(AdminResource, "/admin/records", "/admin/records/<int:record_id>")
+    api.add_resource(ExportResource, "/admin/records/export")
+    api.add_resource(BulkStatusResource, "/admin/records/bulk")
+    api.add_resource(StatsResource, "/admin/stats")
+    api.add_resource(ResolutionTimeResource, "/admin/stats/resolution")
+    api.add_resource(RateLimitResource, "/admin/ratelimit")
+    api.add_resource(PoolResource, "/admin/pool")
 
 
-# Initialize other extensions
-bcrypt = Bcrypt(app)
-CORS(app, resources={r"/*": {"origins": "*"}})
+_app = None
 
-# Auth routes
-api.add_resource(SignupResource, "/signup")
-api.add_resource(LoginResource, "/login","/profile")
 
-# User routes
-api.add_resource(RecordResource, "/records", "/records/<int:record_id>")
+def __getattr__(name):
+    # `from app import app` / `gunicorn app:app` build the app on first access,
+    # so importing create_app alone doesn't build one
+    global _app
+    if name == 'app':
+        if _app is None:
+            _app = create_app()
+        return _app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
-# Admin routes
-api.add_resource(AdminResource, "/admin/records", "/admin/records/<int:record_id>")# Run the server
+# Run the development server (production: gunicorn, see gunicorn.conf.py)
 if __name__ == '__main__':
-    port = int(os.environ.get("PORT", 5555)) 
-    app.run(host="0.0.0.0", port=port, debug=True)
+    port = int(os.environ.get("PORT", 5555))
+    create_app().run(host="0.0.0.0", port=port, debug=os.environ.get("FLASK_DEBUG") == "1")
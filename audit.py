@@ -0,0 +1,204 @@
+"""
+Record history (record_events). Events are inserted on the connection of
+the change, so they commit or roll back with it: ORM writes through the
+mapper events below, Core writes (bulk import, bulk and admin status
+changes) pass event_row()s to log_events themselves.
+"""
+import statistics
+from datetime import datetime, timedelta
+from flask import has_request_context
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import event, func, inspect, select, text
+from models.baseModel import db
+from models.recordModel import Record
+from models.recordEventModel import RecordEvent, utcnow
+
+events_table = RecordEvent.__table__
+
+# Columns whose old and new values go into `changes` on edits
+AUDITED = ('type', 'title', 'description', 'latitude', 'longitude', 'images', 'images_status')
+
+
+# Triggers that reject UPDATE and DELETE on record_events
+POSTGRES_INSTALL = [
+    """
+    CREATE OR REPLACE FUNCTION record_events_append_only() RETURNS trigger AS $$
+    BEGIN
+        RAISE EXCEPTION 'record_events is append-only';
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER record_events_append_only BEFORE UPDATE OR DELETE ON record_events
+    FOR EACH ROW EXECUTE FUNCTION record_events_append_only()
+    """,
+]
+
+POSTGRES_UNINSTALL = [
+    "DROP TRIGGER IF EXISTS record_events_append_only ON record_events",
+    "DROP FUNCTION IF EXISTS record_events_append_only()",
+]
+
+SQLITE_INSTALL = [
+    """
+    CREATE TRIGGER IF NOT EXISTS record_events_no_update BEFORE UPDATE ON record_events BEGIN
+        SELECT RAISE(ABORT, 'record_events is append-only');
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS record_events_no_delete BEFORE DELETE ON record_events BEGIN
+        SELECT RAISE(ABORT, 'record_events is append-only');
+    END
+    """,
+]
+
+SQLITE_UNINSTALL = [
+    "DROP TRIGGER IF EXISTS record_events_no_delete",
+    "DROP TRIGGER IF EXISTS record_events_no_update",
+]
+
+DDL = {
+    'postgresql': (POSTGRES_INSTALL, POSTGRES_UNINSTALL),
+    'sqlite': (SQLITE_INSTALL, SQLITE_UNINSTALL),
+}
+
+
+def install_append_only(connection):
+    for statement in DDL.get(connection.dialect.name, ([], []))[0]:
+        connection.execute(text(statement))
+
+
+def uninstall_append_only(connection):
+    for statement in DDL.get(connection.dialect.name, ([], []))[1]:
+        connection.execute(text(statement))
+
+
+@event.listens_for(events_table, 'after_create')
+def create_append_only_triggers(target, connection, **kw):
+    # db.create_all() (tests, benchmarks) gets the same triggers as migrations
+    install_append_only(connection)
+
+
+def acting_user_id():
+    """The authenticated user, None outside a request (background uploads, CLI)."""
+    if not has_request_context():
+        return None
+    try:
+        identity = get_jwt_identity()
+    except RuntimeError:
+        # no JWT was checked for this request
+        return None
+    return int(identity) if identity is not None else None
+
+
+def event_row(kind, record_id, user_id, status, old_status=None, changes=None, version=None):
+    return {
+        'record_id': record_id,
+        'kind': kind,
+        'status': status,
+        'old_status': old_status,
+        'changes': changes,
+        'version': version,
+        'user_id': user_id,
+        'actor_id': acting_user_id(),
+        'created_at': utcnow(),
+    }
+
+
+def log_events(connection, rows):
+    if rows:
+        connection.execute(events_table.insert(), rows)
+
+
+def _json_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+@event.listens_for(Record, 'after_insert')
+def log_insert(mapper, connection, target):
+    log_events(connection, [event_row('created', target.id, target.user_id, target.status,
+                                      version=target.version)])
+
+
+@event.listens_for(Record, 'after_update')
+def log_update(mapper, connection, target):
+    state = inspect(target)
+    status = state.attrs.status.history
+    changes = {}
+    for name in AUDITED:
+        history = state.attrs[name].history
+        if history.deleted and history.added and history.deleted[0] != history.added[0]:
+            changes[name] = [_json_value(history.deleted[0]), _json_value(history.added[0])]
+
+    rows = []
+    if status.deleted and status.added and status.deleted[0] != status.added[0]:
+        rows.append(event_row('status', target.id, target.user_id, target.status, status.deleted[0],
+                              version=target.version))
+    if changes:
+        rows.append(event_row('updated', target.id, target.user_id, target.status,
+                              changes=changes, version=target.version))
+    log_events(connection, rows)
+
+
+@event.listens_for(Record, 'after_delete')
+def log_delete(mapper, connection, target):
+    log_events(connection, [event_row('deleted', target.id, target.user_id, target.status,
+                                      version=target.version)])
+
+
+def format_event(row):
+    return {
+        'id': row.id,
+        'record_id': row.record_id,
+        'kind': row.kind,
+        'status': row.status,
+        'old_status': row.old_status,
+        'changes': row.changes,
+        'version': row.version,
+        'user_id': row.user_id,
+        'actor_id': row.actor_id,
+        'created_at': row.created_at.isoformat() + 'Z',
+    }
+
+
+def timeline(record_id, after=None, limit=50):
+    """A record's events oldest first, from the (record_id, id) index."""
+    query = select(events_table).where(events_table.c.record_id == record_id)
+    if after is not None:
+        query = query.where(events_table.c.id > after)
+    return db.session.execute(query.order_by(events_table.c.id).limit(limit)).all()
+
+
+def time_to_resolution(days=30):
+    """
+    Hours from creation to the first resolution, for records resolved in the
+    last `days` days. Resolutions are found through the created_at index;
+    each one's creation through the record_id index.
+    """
+    since = utcnow() - timedelta(days=days)
+    resolved = (
+        select(events_table.c.record_id, func.min(events_table.c.created_at).label('resolved_at'))
+        .where(events_table.c.created_at >= since, events_table.c.kind == 'status',
+               events_table.c.status == 'resolved')
+        .group_by(events_table.c.record_id)
+        .subquery()
+    )
+    created = events_table.alias('created')
+    rows = db.session.execute(
+        select(resolved.c.resolved_at, func.min(created.c.created_at).label('created_at'))
+        .join(created, created.c.record_id == resolved.c.record_id)
+        .where(created.c.kind == 'created')
+        .group_by(resolved.c.record_id, resolved.c.resolved_at)
+    ).all()
+
+    hours = sorted((r.resolved_at - r.created_at).total_seconds() / 3600 for r in rows)
+    result = {'days': days, 'resolved': len(hours), 'mean_hours': None, 'median_hours': None,
+              'p90_hours': None, 'max_hours': None}
+    if hours:
+        result.update(
+            mean_hours=round(statistics.fmean(hours), 2),
+            median_hours=round(statistics.median(hours), 2),
+            p90_hours=round(hours[min(len(hours) - 1, int(len(hours) * 0.9))], 2),
+            max_hours=round(hours[-1], 2),
+        )
+    return result
@@ -0,0 +1,56 @@
+import os
+from flask import g
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import event
+from models.baseModel import db
+from models.userModel import User
+from cache import TTLCache
+
+# user id -> role. Bounds how long a role change takes to reach other
+# workers; on this worker the entry is dropped as soon as the role changes.
+role_cache = TTLCache(maxsize=10000, ttl=int(os.getenv('ROLE_CACHE_TTL', 60)))
+
+
+def current_user_id():
+    return int(get_jwt_identity())
+
+
+def current_user():
+    """Load the authenticated user at most once per request."""
+    user_id = current_user_id()
+    user = g.get('current_user')
+    # g outlives the request when an app context was pushed by the caller
+    if user is None or user.id != user_id:
+        user = g.current_user = db.session.get(User, user_id)
+    return user
+
+
+def get_role(user_id=None):
+    """
+    Role of the authenticated user (or `user_id`).
+    The JWT carries a `role` claim for clients, but authorization is
+    checked against the database through role_cache so a demoted admin
+    loses access without waiting for the token to expire.
+    """
+    user_id = current_user_id() if user_id is None else int(user_id)
+    role = role_cache.get(user_id)
+    if role is None:
+        if user_id == current_user_id():
+            user = current_user()
+        else:
+            user = db.session.get(User, user_id)
+        if user is None:
+            return None
+        role = user.role
+        role_cache.set(user_id, role)
+    return role
+
+
+def is_admin(user_id=None):
+    return get_role(user_id) == "admin"
+
+
+@event.listens_for(User.role, 'set')
+def invalidate_role(target, value, oldvalue, initiator):
+    if target.id is not None and value != oldvalue:
+        role_cache.delete(target.id)
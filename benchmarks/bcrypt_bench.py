@@ -0,0 +1,52 @@
+"""
+Password checks (logins) per second for each bcrypt cost, run through the
+hashing thread pool from several request threads at once.
+
+    python benchmarks/bcrypt_bench.py --rounds 10 11 12 13 --threads 8
+"""
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.baseModel import bcrypt  # noqa: E402
+from hashing import check_password, get_executor  # noqa: E402
+
+PASSWORD = 'Benchmark1'
+
+
+def logins_per_second(rounds, threads, seconds):
+    password_hash = bcrypt.generate_password_hash(PASSWORD, rounds=rounds).decode('utf-8')
+    deadline = time.perf_counter() + seconds
+
+    def client():
+        done = 0
+        while time.perf_counter() < deadline:
+            check_password(password_hash, PASSWORD)
+            done += 1
+        return done
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as clients:
+        total = sum(clients.map(lambda _: client(), range(threads)))
+    return total / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rounds', type=int, nargs='+', default=[10, 11, 12, 13])
+    parser.add_argument('--threads', type=int, default=8, help='concurrent login requests')
+    parser.add_argument('--seconds', type=float, default=3)
+    args = parser.parse_args()
+
+    print(f"hashing pool: {get_executor()._max_workers} threads, {args.threads} concurrent clients")
+    for rounds in args.rounds:
+        rate = logins_per_second(rounds, args.threads, args.seconds)
+        print(f"cost {rounds:2}: {rate:8.1f} logins/sec  ({1000 / rate * args.threads:7.1f} ms per login under load)")
+
+
+if __name__ == '__main__':
+    main()
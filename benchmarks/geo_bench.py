@@ -0,0 +1,93 @@
+"""
+Time bbox and radius queries over a synthetic set of record points:
+a plain latitude/longitude range scan against the geohash index path.
+
+    python benchmarks/geo_bench.py --rows 1000000
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DB_PATH = os.path.join(tempfile.gettempdir(), 'jiseti_geo_bench.db')
+os.environ.setdefault('DATABASE_URL', f'sqlite:///{DB_PATH}')
+os.environ.setdefault('JWT_SECRET', 'benchmark')
+
+from sqlalchemy import and_, func, select  # noqa: E402
+from app import app  # noqa: E402
+from models.baseModel import db  # noqa: E402
+from models.userModel import User  # noqa: E402
+from models.recordModel import Record  # noqa: E402
+import geo  # noqa: E402
+
+# Kenya-ish bounding box for the synthetic points
+MIN_LAT, MAX_LAT = -4.7, 5.0
+MIN_LON, MAX_LON = 33.9, 41.9
+
+
+def seed(rows, batch=50000):
+    user = User(username='benchuser', email='bench@example.com', first_name='Bench', last_name='User')
+    user.password = 'x'
+    db.session.add(user)
+    db.session.flush()
+    now = datetime.now(timezone.utc)
+    rng = random.Random(42)
+    for start in range(0, rows, batch):
+        values = []
+        for _ in range(min(batch, rows - start)):
+            lat = rng.uniform(MIN_LAT, MAX_LAT)
+            lon = rng.uniform(MIN_LON, MAX_LON)
+            values.append({
+                'type': 'Red-Flag', 'title': 'bribery', 'description': 'Synthetic benchmark report',
+                'status': 'pending', 'images_status': 'ready', 'created_at': now, 'user_id': user.id,
+                'latitude': lat, 'longitude': lon, 'geohash': geo.encode_geohash(lat, lon),
+            })
+        db.session.execute(Record.__table__.insert(), values)
+    db.session.commit()
+
+
+def timed(label, statement, repeat):
+    best = float('inf')
+    count = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count = db.session.execute(statement).scalar()
+        best = min(best, time.perf_counter() - start)
+    print(f"{label:32} {best * 1000:9.2f} ms  ({count} rows)")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--radius-km', type=float, default=5)
+    args = parser.parse_args()
+
+    if os.path.exists(DB_PATH):
+        os.remove(DB_PATH)
+
+    with app.app_context():
+        db.create_all()
+        start = time.perf_counter()
+        seed(args.rows)
+        print(f"seeded {args.rows} points in {time.perf_counter() - start:.1f}s\n")
+
+        lat, lon = -1.28, 36.82
+        box = geo.radius_bbox(lat, lon, args.radius_km)
+        count = select(func.count()).select_from(Record)
+
+        timed('bbox, lat/lon range scan', count.where(and_(
+            Record.latitude.between(box[0], box[2]), Record.longitude.between(box[1], box[3]))), args.repeat)
+        timed('bbox, geohash index', count.where(geo.bbox_filter(Record, *box)), args.repeat)
+        timed(f'radius {args.radius_km:g} km, geohash index',
+              count.where(geo.radius_filter(Record, db.session, lat, lon, args.radius_km)), args.repeat)
+
+    os.remove(DB_PATH)
+
+
+if __name__ == '__main__':
+    main()
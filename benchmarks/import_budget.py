@@ -0,0 +1,76 @@
+"""
+Import time of the request-serving path, from `python -X importtime` in a
+fresh interpreter: prints the total and the packages that take the longest
+(summing each module's own import time into its top level package), and
+exits 1 if the total is over --budget-ms or a CLI/upload-only module was
+imported.
+
+    python benchmarks/import_budget.py --budget-ms 750
+    python benchmarks/import_budget.py --module cli    # the flask command's app
+"""
+import os
+import sys
+import argparse
+import statistics
+import subprocess
+import tempfile
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Only needed by migrations, the outbox worker or the first upload
+FORBIDDEN = ('alembic', 'flask_migrate', 'mako', 'cloudinary', 'smtplib', 'email.mime', 'mailer')
+
+
+def profile(module):
+    env = dict(os.environ)
+    env.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(tempfile.gettempdir(), 'jiseti_import_budget.db')}")
+    env.setdefault('JWT_SECRET', 'benchmark')
+    stderr = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}; {module}.create_app()'],
+                            cwd=ROOT, env=env, capture_output=True, text=True, check=True).stderr
+
+    # lines look like "import time:       self |  cumulative | <indent>name"
+    packages = defaultdict(int)
+    modules = set()
+    total = 0
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        modules.add(name.strip())
+        packages[name.strip().split('.')[0]] += int(own)
+        # nested imports are already part of their parent's cumulative time
+        if len(name) - len(name.lstrip()) == 1:
+            total += int(cumulative)
+    return total / 1000, {k: v / 1000 for k, v in packages.items()}, modules
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--module', default='app')
+    parser.add_argument('--budget-ms', type=float)
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--top', type=int, default=12)
+    args = parser.parse_args()
+
+    runs = [profile(args.module) for _ in range(args.runs)]
+    total = statistics.median(r[0] for r in runs)
+    packages, modules = runs[-1][1], runs[-1][2]
+
+    print(f"import {args.module} + create_app(): {total:.1f} ms (median of {args.runs})")
+    for name, ms in sorted(packages.items(), key=lambda kv: -kv[1])[:args.top]:
+        print(f"  {name:28} {ms:8.1f} ms")
+
+    failed = False
+    loaded = [f for f in FORBIDDEN if any(m == f or m.startswith(f + '.') for m in modules)]
+    if args.module == 'app' and loaded:
+        print(f"FAIL: not needed to serve requests: {', '.join(loaded)}")
+        failed = True
+    if args.budget_ms is not None and total > args.budget_ms:
+        print(f"FAIL: {total:.1f} ms is over the {args.budget_ms:.0f} ms budget")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,467 @@
+"""
+Load test for the whole API through the Flask test client. Seeds a SQLite
+(or --database-url) database with synthetic users, records and notifications,
+then drives each scenario from several threads and reports latency
+percentiles, throughput and SQL statements per request. Cloudinary and SMTP
+are replaced by stubs with a configurable delay.
+
+    python benchmarks/load_bench.py --records 100000 --threads 8 --duration 10
+    python benchmarks/load_bench.py --save-baseline benchmarks/baseline.json
+    python benchmarks/load_bench.py --baseline benchmarks/baseline.json
+
+With --baseline the run exits 1 when a scenario's p95 latency grows by more
+than --tolerance, or it runs more SQL statements per request than before.
+Seeding 10^6 records takes a few minutes; --reuse keeps an existing database.
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from io import BytesIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DB_PATH = os.path.join(tempfile.gettempdir(), 'jiseti_load_bench.db')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--database-url', default=f'sqlite:///{DB_PATH}')
+    parser.add_argument('--records', type=int, default=100000)
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--notifications', type=float, default=0.5, help='notifications per record')
+    parser.add_argument('--reuse', action='store_true', help='keep an already seeded database')
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=5, help='seconds per scenario')
+    parser.add_argument('--scenarios', nargs='+', help='run only these scenarios')
+    parser.add_argument('--bcrypt-rounds', type=int, default=4,
+                        help='keeps signup/login from only measuring bcrypt')
+    parser.add_argument('--upload-latency-ms', type=float, default=50)
+    parser.add_argument('--smtp-latency-ms', type=float, default=20)
+    parser.add_argument('--save-baseline')
+    parser.add_argument('--baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed p95 growth, 0.25 = 25%%')
+    return parser.parse_args()
+
+
+args = parse_args()
+os.environ['DATABASE_URL'] = args.database_url
+os.environ.setdefault('JWT_SECRET', 'load-benchmark-secret-key-0123456789')
+os.environ['BCRYPT_LOG_ROUNDS'] = str(args.bcrypt_rounds)
+# every request comes from one address
+os.environ['LOGIN_LIMIT_IP'] = '1000000000/60'
+os.environ['LOGIN_LIMIT_EMAIL'] = '1000000000/60'
+
+from sqlalchemy import event  # noqa: E402
+from flask_jwt_extended import create_access_token  # noqa: E402
+from app import app  # noqa: E402
+from models.baseModel import db, bcrypt  # noqa: E402
+from models.userModel import User  # noqa: E402
+from models.recordModel import Record  # noqa: E402
+from models.notificationModel import Notification  # noqa: E402
+from mailer import drain_outbox  # noqa: E402
+from stats import rebuild_stats  # noqa: E402
+import geo  # noqa: E402
+import uploads  # noqa: E402
+
+PASSWORD = 'Benchmark1'
+RED_FLAG_TITLES = ['corruption', 'theft', 'land-grabbing', 'bribery', 'embezzlement', 'fraud']
+INTERVENTION_TITLES = ['flooding', 'sewage', 'water shortage', 'electricity issues', 'collapsed bridges']
+STATUSES = ['pending'] * 6 + ['under investigation'] * 2 + ['rejected', 'resolved']
+
+
+class StubStorage:
+    """Stands in for Cloudinary."""
+
+    def __init__(self, latency):
+        self.latency = latency
+
+    def upload(self, path):
+        time.sleep(self.latency)
+        return f'https://stub.invalid/{os.path.basename(path)}'
+
+
+class StubMailer:
+    """Stands in for the SMTP connection."""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.sent = 0
+
+    def send(self, recipient_email, subject, body):
+        time.sleep(self.latency)
+        self.sent += 1
+
+
+_queries = threading.local()
+
+
+def count_query(*_):
+    _queries.count = getattr(_queries, 'count', 0) + 1
+
+
+def random_record(rng, user_id, created_at):
+    record_type = rng.choice(['Red-Flag', 'Intervention'])
+    titles = RED_FLAG_TITLES if record_type == 'Red-Flag' else INTERVENTION_TITLES
+    lat, lon = rng.uniform(-4.7, 5.0), rng.uniform(33.9, 41.9)
+    return {
+        'type': record_type,
+        'title': rng.choice(titles),
+        'description': f'Synthetic report {rng.randrange(10 ** 6)} about the {rng.choice(titles)} problem',
+        'status': rng.choice(STATUSES),
+        'images': [],
+        'images_status': 'ready',
+        'latitude': lat,
+        'longitude': lon,
+        'geohash': geo.encode_geohash(lat, lon),
+        'user_id': user_id,
+        'created_at': created_at,
+        'updated_at': created_at,
+    }
+
+
+def seed(rng, batch=20000):
+    db.drop_all()
+    db.create_all()
+    start = time.perf_counter()
+    password_hash = bcrypt.generate_password_hash(PASSWORD).decode('utf-8')
+    db.session.execute(User.__table__.insert(), [{
+        'username': f'benchuser{i:05}',
+        'email': f'bench{i}@example.com',
+        'first_name': 'Bench',
+        'last_name': 'User',
+        'password': password_hash,
+        'role': 'admin' if i == 0 else 'user',
+        'created_at': datetime.now(timezone.utc),
+    } for i in range(args.users)])
+
+    now = datetime.now(timezone.utc)
+    for offset in range(0, args.records, batch):
+        rows = [
+            random_record(rng, rng.randint(2, args.users), now - timedelta(minutes=rng.randrange(525600)))
+            for _ in range(min(batch, args.records - offset))
+        ]
+        db.session.execute(Record.__table__.insert(), rows)
+
+    notifications = int(args.records * args.notifications)
+    for offset in range(0, notifications, batch):
+        rows = []
+        for _ in range(min(batch, notifications - offset)):
+            record_id = rng.randint(1, args.records)
+            rows.append({'message': 'Status changed', 'record_id': record_id,
+                         'user_id': rng.randint(2, args.users), 'created_at': now})
+        db.session.execute(Notification.__table__.insert(), rows)
+    db.session.commit()
+    rebuild_stats()
+    print(f"seeded {args.users} users, {args.records} records, {notifications} notifications "
+          f"in {time.perf_counter() - start:.1f}s")
+
+
+def is_seeded():
+    try:
+        return db.session.query(Record.id).count() >= args.records
+    except Exception:
+        db.session.rollback()
+        return False
+
+
+class Context:
+    """Tokens and ids the scenarios pick from, shared by all threads."""
+
+    def __init__(self, rng):
+        self.rng = rng
+        self.lock = threading.Lock()
+        self.admin = {'Authorization': f'Bearer {create_access_token(identity="1")}'}
+        self.users = {}
+        self.own_records = {}
+        rows = db.session.query(Record.id, Record.user_id).filter(Record.status == 'pending').limit(20000).all()
+        for record_id, user_id in rows:
+            self.own_records.setdefault(user_id, []).append(record_id)
+        for user_id in list(self.own_records)[:200]:
+            self.users[user_id] = {'Authorization': f'Bearer {create_access_token(identity=str(user_id))}'}
+        self.user_ids = list(self.users)
+        self.record_ids = [record_id for ids in self.own_records.values() for record_id in ids]
+        self.created = []
+        self.signups = 0
+
+    def user(self):
+        with self.lock:
+            user_id = self.rng.choice(self.user_ids)
+            return user_id, self.users[user_id], self.rng.choice(self.own_records[user_id])
+
+    def record_id(self):
+        with self.lock:
+            return self.rng.choice(self.record_ids)
+
+    def next_signup(self):
+        with self.lock:
+            self.signups += 1
+            # unique across --reuse runs
+            return f'{int(time.time())}x{self.signups}'
+
+    def take_created(self):
+        with self.lock:
+            return self.created.pop() if self.created else None
+
+
+def record_form(rng):
+    return {
+        'type': 'Red-Flag',
+        'title': rng.choice(RED_FLAG_TITLES),
+        'description': 'Benchmark report with an attached photo',
+        'latitude': str(rng.uniform(-4.7, 5.0)),
+        'longitude': str(rng.uniform(33.9, 41.9)),
+        'images': (BytesIO(b'\xff\xd8' + os.urandom(2048)), 'photo.jpg'),
+    }
+
+
+def signup(client, ctx):
+    suffix = ctx.next_signup()
+    return client.post('/signup', json={
+        'username': f'signup{suffix}', 'email': f'signup{suffix}@example.com', 'password': PASSWORD,
+        'first_name': 'Load', 'last_name': 'Test'}), 201
+
+
+def login(client, ctx):
+    user_id, _, _ = ctx.user()
+    return client.post('/login', json={'email': f'bench{user_id - 1}@example.com', 'password': PASSWORD}), 200
+
+
+def profile(client, ctx):
+    return client.get('/profile', headers=ctx.user()[1]), 200
+
+
+def records_list(client, ctx):
+    return client.get('/records?per_page=20', headers=ctx.user()[1]), 200
+
+
+def records_list_include(client, ctx):
+    return client.get('/records?per_page=20&include=user,notifications', headers=ctx.user()[1]), 200
+
+
+def record_get(client, ctx):
+    _, headers, record_id = ctx.user()
+    return client.get(f'/records/{record_id}', headers=headers), 200
+
+
+def record_create(client, ctx):
+    headers = ctx.user()[1]
+    response = client.post('/records', data=record_form(ctx.rng), headers=headers,
+                           content_type='multipart/form-data')
+    if response.status_code == 201:
+        with ctx.lock:
+            ctx.created.append((headers, response.get_json()['record']['id']))
+    return response, 201
+
+
+def record_update(client, ctx):
+    _, headers, record_id = ctx.user()
+    form = record_form(ctx.rng)
+    del form['images']
+    return client.put(f'/records/{record_id}', data=form, headers=headers,
+                      content_type='multipart/form-data'), 200
+
+
+def record_delete(client, ctx):
+    created = ctx.take_created()
+    if created is None:
+        return None, None
+    headers, record_id = created
+    return client.delete(f'/records/{record_id}', headers=headers), 200
+
+
+def bulk_import(client, ctx):
+    rows = [{'type': 'Intervention', 'title': 'flooding', 'description': 'Bulk imported benchmark report',
+             'latitude': -1.28, 'longitude': 36.82} for _ in range(50)]
+    return client.post('/records/bulk', json={'records': rows}, headers=ctx.user()[1]), 201
+
+
+def clusters(client, ctx):
+    return client.get('/records/clusters/6/38/31', headers=ctx.admin), 200
+
+
+def notifications(client, ctx):
+    return client.get('/notifications?limit=20', headers=ctx.user()[1]), 200
+
+
+def unread_count(client, ctx):
+    return client.get('/notifications/unread-count', headers=ctx.user()[1]), 200
+
+
+def admin_list(client, ctx):
+    return client.get('/admin/records?per_page=50', headers=ctx.admin), 200
+
+
+def admin_list_filtered(client, ctx):
+    return client.get('/admin/records?status=pending&type=Red-Flag&per_page=50', headers=ctx.admin), 200
+
+
+def admin_search(client, ctx):
+    return client.get('/admin/records?q=corruption&per_page=20', headers=ctx.admin), 200
+
+
+def admin_get(client, ctx):
+    return client.get(f'/admin/records/{ctx.record_id()}', headers=ctx.admin), 200
+
+
+def admin_patch(client, ctx):
+    status = ctx.rng.choice(['pending', 'under investigation'])
+    return client.patch(f'/admin/records/{ctx.record_id()}', json={'status': status}, headers=ctx.admin), 200
+
+
+def admin_stats(client, ctx):
+    return client.get('/admin/stats?days=30', headers=ctx.admin), 200
+
+
+def admin_export(client, ctx):
+    since = (datetime.now(timezone.utc) - timedelta(days=1)).strftime('%Y-%m-%dT%H:%M:%S')
+    response = client.get(f'/admin/records/export?format=ndjson&created_from={since}', headers=ctx.admin)
+    response.get_data()
+    return response, 200
+
+
+# Order matters: record_delete removes what record_create added
+SCENARIOS = {fn.__name__: fn for fn in [
+    signup, login, profile,
+    records_list, records_list_include, record_get, record_create, record_update, record_delete,
+    bulk_import, clusters, notifications, unread_count,
+    admin_list, admin_list_filtered, admin_search, admin_get, admin_patch, admin_stats, admin_export,
+]}
+
+
+def percentile(ordered, fraction):
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def run_scenario(scenario, ctx):
+    latencies, queries, statuses = [], [], Counter()
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.duration
+
+    def worker():
+        client = app.test_client()
+        while time.perf_counter() < deadline:
+            _queries.count = 0
+            start = time.perf_counter()
+            response, expected = scenario(client, ctx)
+            elapsed = time.perf_counter() - start
+            if response is None:
+                return
+            with lock:
+                latencies.append(elapsed)
+                queries.append(_queries.count)
+                statuses['ok' if response.status_code == expected else response.status_code] += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        for future in [pool.submit(worker) for _ in range(args.threads)]:
+            future.result()
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': sum(count for status, count in statuses.items() if status != 'ok'),
+        'error_statuses': {str(s): c for s, c in statuses.items() if s != 'ok'},
+        'throughput_rps': round(len(latencies) / wall, 1) if wall else 0,
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 2) if latencies else None,
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 2) if latencies else None,
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2) if latencies else None,
+        'queries_per_request': round(sum(queries) / len(queries), 2) if queries else None,
+    }
+
+
+def outbox_drain():
+    mailer = StubMailer(args.smtp_latency_ms / 1000)
+    start = time.perf_counter()
+    while drain_outbox(mailer, batch_size=100):
+        pass
+    elapsed = time.perf_counter() - start
+    return {'emails': mailer.sent, 'emails_per_sec': round(mailer.sent / elapsed, 1) if mailer.sent else 0}
+
+
+def compare(results, baseline):
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get('scenarios', {}).get(name)
+        if not before or not result['requests'] or not before.get('p95_ms'):
+            continue
+        if result['p95_ms'] > before['p95_ms'] * (1 + args.tolerance):
+            regressions.append(f"{name}: p95 {before['p95_ms']} -> {result['p95_ms']} ms")
+        # averages move a little with cache hits, a new query per request is +1
+        if result['queries_per_request'] > before['queries_per_request'] + 0.5:
+            regressions.append(f"{name}: queries/request {before['queries_per_request']} "
+                               f"-> {result['queries_per_request']}")
+    return regressions
+
+
+def main():
+    rng = random.Random(42)
+    names = args.scenarios or list(SCENARIOS)
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        sys.exit(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    uploads.set_storage(StubStorage(args.upload_latency_ms / 1000))
+    with app.app_context():
+        if not (args.reuse and is_seeded()):
+            seed(rng)
+        event.listen(db.engine, 'before_cursor_execute', count_query)
+        ctx = Context(rng)
+
+    print(f"\n{args.threads} threads, {args.duration:g}s per scenario\n")
+    print(f"{'scenario':22} {'reqs':>7} {'err':>5} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'p99 ms':>8} {'queries':>8}")
+    results = {}
+    for name in names:
+        result = results[name] = run_scenario(SCENARIOS[name], ctx)
+        cells = [result[k] for k in ('p50_ms', 'p95_ms', 'p99_ms', 'queries_per_request')]
+        print(f"{name:22} {result['requests']:>7} {result['errors']:>5} {result['throughput_rps']:>8} "
+              + ' '.join(f"{'-' if v is None else v:>8}" for v in cells))
+
+    with app.app_context():
+        drained = outbox_drain()
+    print(f"\noutbox: {drained['emails']} emails at {drained['emails_per_sec']}/s through the stub mailer")
+
+    report = {
+        'meta': {
+            'date': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'database': args.database_url.split(':', 1)[0],
+            'records': args.records,
+            'users': args.users,
+            'threads': args.threads,
+            'duration': args.duration,
+            'bcrypt_rounds': args.bcrypt_rounds,
+            'cpus': os.cpu_count(),
+        },
+        'scenarios': results,
+        'outbox': drained,
+    }
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"baseline written to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f))
+        if regressions:
+            print('\nregressions against the baseline:')
+            for line in regressions:
+                print(f'  {line}')
+            sys.exit(1)
+        print('\nno regressions against the baseline')
+
+
+if __name__ == '__main__':
+    main()
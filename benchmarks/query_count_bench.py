@@ -0,0 +1,103 @@
+"""
+SQL statements per records list request as the page grows. With
+?include=user,notifications the count must not depend on the page size;
+the lazy-loading loop is shown for comparison. Exits 1 if the count grows.
+
+    python benchmarks/query_count_bench.py --sizes 5 25 100
+"""
+import os
+import sys
+import argparse
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DB_PATH = os.path.join(tempfile.gettempdir(), 'jiseti_query_count_bench.db')
+os.environ.setdefault('DATABASE_URL', f'sqlite:///{DB_PATH}')
+os.environ.setdefault('JWT_SECRET', 'benchmark')
+
+from sqlalchemy import event  # noqa: E402
+from flask_jwt_extended import create_access_token  # noqa: E402
+from app import app  # noqa: E402
+from models.baseModel import db  # noqa: E402
+from models.userModel import User  # noqa: E402
+from models.recordModel import Record  # noqa: E402
+from models.notificationModel import Notification  # noqa: E402
+
+
+class QueryCounter:
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _count(self, *args):
+        self.count += 1
+
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self._count)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, 'before_cursor_execute', self._count)
+
+
+def seed(records):
+    db.drop_all()
+    db.create_all()
+    start = datetime.now(timezone.utc)
+    # one reporter per record so user loading cannot hide behind the identity map
+    for i in range(records):
+        user = User(username=f'reporter{i:04}', first_name='Bench', last_name='User',
+                    email=f'reporter{i}@example.com', role='admin' if i == 0 else 'user')
+        user.password = 'x'
+        db.session.add(user)
+        db.session.flush()
+        record = Record(type='Red-Flag', title='corruption', description='Benchmark record text',
+                        latitude=-1.28, longitude=36.82, user_id=user.id,
+                        created_at=start - timedelta(minutes=i))
+        db.session.add(record)
+        db.session.flush()
+        for n in range(2):
+            db.session.add(Notification(message=f'Update {n}', user_id=user.id, record_id=record.id))
+    db.session.commit()
+    return create_access_token(identity=str(1))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[5, 25, 100])
+    args = parser.parse_args()
+
+    client = app.test_client()
+    counts = []
+    with app.app_context():
+        token = seed(max(args.sizes))
+        headers = {'Authorization': f'Bearer {token}'}
+        engine = db.engine
+        # warm the role cache so every measured request does the same lookups
+        client.get('/records?per_page=1', headers=headers)
+
+        print(f"{'page':>5} {'include':>9} {'lazy loop':>10}")
+        for size in args.sizes:
+            url = f'/records?per_page={size}&include=user,notifications'
+            db.session.remove()
+            with QueryCounter(engine) as included:
+                response = client.get(url, headers=headers)
+            assert response.status_code == 200, response.get_data(as_text=True)
+            assert len(response.get_json()['records']) == size
+
+            db.session.remove()
+            with QueryCounter(engine) as lazy:
+                for record in Record.query.order_by(Record.created_at.desc()).limit(size):
+                    record.user, list(record.notifications)
+
+            counts.append(included.count)
+            print(f'{size:>5} {included.count:>9} {lazy.count:>10}')
+
+    if len(set(counts)) != 1:
+        print('query count grows with the page size')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Compare the old record list path (full ORM objects + json.dumps) with the
+row tuple + serializers.dumps path used by the records API.
+
+    python benchmarks/serialization_bench.py --rows 20000
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+os.environ.setdefault('JWT_SECRET', 'benchmark')
+
+from app import app  # noqa: E402
+from models.baseModel import db  # noqa: E402
+from models.userModel import User  # noqa: E402
+from models.recordModel import Record  # noqa: E402
+from serializers import RECORD_COLUMNS, format_record, dumps  # noqa: E402
+
+
+def seed(rows):
+    user = User(username='benchuser', email='bench@example.com', first_name='Bench', last_name='User')
+    user.password = 'x'
+    db.session.add(user)
+    db.session.flush()
+    now = datetime.now(timezone.utc)
+    db.session.execute(Record.__table__.insert(), [{
+        'type': 'Red-Flag',
+        'title': 'bribery',
+        'description': f'Benchmark report number {i} with some text',
+        'latitude': -1.28,
+        'longitude': 36.82,
+        'images': ['https://example.com/a.jpg'],
+        'images_status': 'ready',
+        'status': 'pending',
+        'created_at': now - timedelta(seconds=i),
+        'updated_at': now,
+        'user_id': user.id,
+    } for i in range(rows)])
+    db.session.commit()
+
+
+def orm_path():
+    records = Record.query.all()
+    body = json.dumps({'records': [{
+        'id': r.id,
+        'type': r.type,
+        'title': r.title,
+        'description': r.description,
+        'latitude': r.latitude,
+        'longitude': r.longitude,
+        'images': r.images or [],
+        'status': r.status,
+        'created_at': r.created_at.isoformat() if r.created_at else None,
+        'updated_at': r.updated_at.isoformat() if r.updated_at else None,
+        'user_id': r.user_id,
+    } for r in records]})
+    db.session.expunge_all()
+    return body
+
+
+def row_path():
+    rows = db.session.query(*RECORD_COLUMNS).all()
+    return dumps({'records': [format_record(r) for r in rows]})
+
+
+def measure(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with app.app_context():
+        db.create_all()
+        seed(args.rows)
+        for name, fn in (('orm + json', orm_path), ('rows + dumps', row_path)):
+            seconds, peak = measure(fn, args.repeat)
+            print(f"{name:14} {seconds * 1000:8.1f} ms  {seconds / args.rows * 1e6:6.2f} us/row  peak {peak / 1e6:6.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+"""
+App for the `flask` command (selected in .flaskenv): the API plus database
+migrations and the maintenance commands. Kept apart from app.py so web
+workers never import alembic or the worker code.
+"""
+import click
+from flask_migrate import Migrate
+
+import app as web
+from models.baseModel import db
+from search import include_object
+
+migrate = Migrate()
+
+
+def create_app(config=None):
+    app = web.create_app(config)
+    migrate.init_app(app, db, include_object=include_object)
+    register_commands(app)
+    return app
+
+
+def register_commands(app):
+    # Background email worker: flask outbox-worker
+    @app.cli.command("outbox-worker")
+    @click.option("--once", is_flag=True, help="Send one batch and exit")
+    @click.option("--poll-interval", default=5.0, help="Seconds to wait when the outbox is empty")
+    @click.option("--batch-size", default=50)
+    @click.option("--max-attempts", default=5, help="Attempts before an email is dead-lettered")
+    def outbox_worker(once, poll_interval, batch_size, max_attempts):
+        from mailer import run_worker
+        run_worker(poll_interval=poll_interval, batch_size=batch_size, max_attempts=max_attempts, once=once)
+
+    # Fail background uploads lost with their worker: flask uploads-sweep
+    @app.cli.command("uploads-sweep")
+    @click.option("--stale-seconds", type=int, help="Pending longer than this counts as lost")
+    def uploads_sweep(stale_seconds):
+        from uploads import STALE_SECONDS, fail_stale_uploads
+        failed = fail_stale_uploads(stale_seconds or STALE_SECONDS)
+        click.echo(f"Marked the images of {failed} records as failed")
+
+    # Recompute the record_stats counters: flask stats-rebuild
+    @app.cli.command("stats-rebuild")
+    def stats_rebuild():
+        from stats import rebuild_stats
+        click.echo(f"Rebuilt {rebuild_stats()} counters")
@@ -0,0 +1,100 @@
+import os
+import time
+import threading
+from collections import Counter
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import Pool, QueuePool
+
+_stats = Counter()
+_max_wait = [0.0]
+_lock = threading.Lock()
+
+
+def _env_bool(name, default):
+    return os.getenv(name, str(default)).lower() in ('1', 'true', 'yes')
+
+
+def _add(name, value=1):
+    with _lock:
+        _stats[name] += value
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long checkouts wait for a free connection."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            _add('timeouts')
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            with _lock:
+                _stats['wait_count'] += 1
+                _stats['wait_seconds_total'] += waited
+                _max_wait[0] = max(_max_wait[0], waited)
+
+
+def engine_options(database_url):
+    """
+    SQLALCHEMY_ENGINE_OPTIONS from the environment:
+    DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT (seconds),
+    DB_POOL_RECYCLE (seconds), DB_POOL_PRE_PING and DB_STATEMENT_TIMEOUT_MS.
+    """
+    options = {'pool_pre_ping': _env_bool('DB_POOL_PRE_PING', True)}
+    if not database_url or database_url.startswith('sqlite'):
+        # SQLite uses its own pools which take no sizing options
+        return options
+
+    options.update({
+        'poolclass': TimedQueuePool,
+        'pool_size': int(os.getenv('DB_POOL_SIZE', 5)),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', 10)),
+        'pool_timeout': float(os.getenv('DB_POOL_TIMEOUT', 30)),
+        # recycle before server/proxy idle timeouts drop the connection
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', 1800)),
+    })
+    statement_timeout = os.getenv('DB_STATEMENT_TIMEOUT_MS')
+    if statement_timeout and database_url.startswith('postgres'):
+        options['connect_args'] = {'options': f'-c statement_timeout={int(statement_timeout)}'}
+    return options
+
+
+@event.listens_for(Pool, 'connect')
+def on_connect(dbapi_connection, connection_record):
+    _add('connects')
+
+
+@event.listens_for(Pool, 'checkout')
+def on_checkout(dbapi_connection, connection_record, connection_proxy):
+    _add('checkouts')
+
+
+@event.listens_for(Pool, 'checkin')
+def on_checkin(dbapi_connection, connection_record):
+    _add('checkins')
+
+
+@event.listens_for(Pool, 'invalidate')
+def on_invalidate(dbapi_connection, connection_record, exception):
+    # includes stale connections caught by pre_ping
+    _add('invalidations')
+
+
+def pool_status(engine):
+    pool = engine.pool
+    with _lock:
+        status = dict(_stats)
+        status['wait_seconds_max'] = _max_wait[0]
+    status['pool_class'] = type(pool).__name__
+    if isinstance(pool, QueuePool):
+        status.update({
+            'size': pool.size(),
+            'checked_out': pool.checkedout(),
+            'checked_in': pool.checkedin(),
+            'overflow': max(pool.overflow(), 0),
+        })
+    return status
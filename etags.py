@@ -0,0 +1,17 @@
+import hashlib
+from flask import current_app, request
+
+
+def make_etag(*parts):
+    """Weak ETag over the values a response is built from."""
+    digest = hashlib.blake2b(repr(parts).encode('utf-8'), digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+
+def not_modified(etag):
+    """True when the client's If-None-Match already has `etag`."""
+    return request.if_none_match.contains_weak(etag.removeprefix('W/').strip('"'))
+
+
+def not_modified_response(etag, headers=None):
+    return current_app.response_class(status=304, headers={'ETag': etag, **(headers or {})})
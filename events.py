@@ -0,0 +1,258 @@
+import os
+import json
+import uuid
+import select
+import logging
+import threading
+import time
+from collections import deque
+from sqlalchemy import event, func, inspect
+from sqlalchemy import select as sql_select
+from sqlalchemy.orm import Session, object_session
+from models.recordModel import Record
+
+logger = logging.getLogger(__name__)
+
+# Recent events kept for Last-Event-ID resume
+HISTORY_SIZE = int(os.getenv('EVENT_HISTORY', 1000))
+# Events a slow client may fall behind by before it is told to reset
+CLIENT_BACKLOG = int(os.getenv('EVENT_CLIENT_BACKLOG', 100))
+NOTIFY_CHANNEL = 'jiseti_records'
+
+# Called with every event, e.g. to drop cached responses. Must be idempotent:
+# events published by this process may be seen twice.
+_listeners = []
+
+
+def add_listener(callback):
+    _listeners.append(callback)
+
+
+def _notify_listeners(event):
+    for callback in _listeners:
+        callback(event)
+
+
+class Subscription:
+    def __init__(self, broker, backlog=CLIENT_BACKLOG):
+        self.broker = broker
+        self.backlog = backlog
+        self.events = deque()
+        # set when events were lost; the client should refetch and carry on
+        self.reset = False
+        self._cond = threading.Condition()
+
+    def put(self, event):
+        with self._cond:
+            if len(self.events) >= self.backlog:
+                self.events.clear()
+                self.reset = True
+            else:
+                self.events.append(event)
+            self._cond.notify()
+
+    def get(self, timeout):
+        """Wait up to `timeout` seconds, return (events, reset)."""
+        with self._cond:
+            if not self.events and not self.reset:
+                self._cond.wait(timeout)
+            events, reset = list(self.events), self.reset
+            self.events.clear()
+            self.reset = False
+            return events, reset
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class LocalBroker:
+    """Fans events out to subscribers in this process. Fine for a single worker."""
+
+    def __init__(self, history_size=HISTORY_SIZE):
+        self.history = deque(maxlen=history_size)
+        self.subscribers = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self, last_event_id=None):
+        subscription = Subscription(self)
+        with self._lock:
+            if last_event_id:
+                ids = [e['id'] for e in self.history]
+                if last_event_id in ids:
+                    for event in list(self.history)[ids.index(last_event_id) + 1:]:
+                        subscription.put(event)
+                else:
+                    # too old or from before a restart
+                    subscription.reset = True
+            self.subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self.subscribers.discard(subscription)
+
+    def start(self):
+        """Begin receiving events published by other processes, if any."""
+
+    def dispatch(self, event):
+        with self._lock:
+            self.history.append(event)
+            subscribers = list(self.subscribers)
+        _notify_listeners(event)
+        for subscription in subscribers:
+            subscription.put(event)
+
+    def publish(self, events):
+        for event in events:
+            self.dispatch(event)
+
+
+class PostgresBroker(LocalBroker):
+    """
+    Publishes with NOTIFY so every worker, this one included, receives each
+    event through its own LISTEN connection. Needs psycopg2.
+    """
+
+    def __init__(self, engine, channel=NOTIFY_CHANNEL, history_size=HISTORY_SIZE):
+        super().__init__(history_size)
+        self.engine = engine
+        self.channel = channel
+        self._listener = None
+
+    def subscribe(self, last_event_id=None):
+        self.start()
+        return super().subscribe(last_event_id)
+
+    def publish(self, events):
+        with self.engine.connect() as connection:
+            for event in events:
+                # payloads are limited to 8000 bytes, events stay small
+                connection.execute(sql_select(func.pg_notify(self.channel, json.dumps(event))))
+            connection.commit()
+        # don't wait for our own NOTIFY to come back before dropping caches
+        for event in events:
+            _notify_listeners(event)
+
+    def start(self):
+        with self._lock:
+            # started lazily so it runs in the worker process after a fork
+            if self._listener is None or not self._listener.is_alive():
+                self._listener = threading.Thread(target=self._listen, name='event-listener', daemon=True)
+                self._listener.start()
+
+    def _listen(self):
+        while True:
+            try:
+                raw = self.engine.raw_connection()
+                try:
+                    connection = raw.driver_connection
+                    connection.autocommit = True
+                    connection.cursor().execute(f'LISTEN {self.channel}')
+                    while True:
+                        if select.select([connection], [], [], 30) == ([], [], []):
+                            continue
+                        connection.poll()
+                        while connection.notifies:
+                            self.dispatch(json.loads(connection.notifies.pop(0).payload))
+                finally:
+                    raw.invalidate()
+            except Exception as e:
+                logger.error(f"Event listener lost its connection: {e}")
+                time.sleep(1)
+
+
+BROKERS = {
+    'local': LocalBroker,
+    'postgres': PostgresBroker,
+}
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """The broker named by EVENT_BROKER (local or postgres)."""
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            name = os.getenv('EVENT_BROKER', 'local')
+            if name not in BROKERS:
+                raise ValueError(f"Unknown EVENT_BROKER: {name}")
+            if name == 'postgres':
+                from models.baseModel import db
+                _broker = PostgresBroker(db.engine)
+            else:
+                _broker = BROKERS[name]()
+    return _broker
+
+
+def set_broker(broker):
+    """Swap the broker, e.g. one backed by another message bus."""
+    global _broker
+    _broker = broker
+
+
+def record_event(kind, record_id, user_id, status, old_status=None, geohashes=()):
+    # geohashes (old and new location) let every worker drop its cached map tiles
+    return {
+        'id': uuid.uuid4().hex,
+        'event': kind,
+        'record_id': record_id,
+        'user_id': user_id,
+        'status': status,
+        'old_status': old_status,
+        'geohashes': sorted({g for g in geohashes if g}),
+        'at': time.time(),
+    }
+
+
+def queue_events(session, events):
+    """Publish these events once `session` commits."""
+    session.info.setdefault('record_events', []).extend(events)
+
+
+@event.listens_for(Record, 'after_insert')
+def on_record_insert(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        queue_events(session, [record_event('created', target.id, target.user_id, target.status,
+                                            geohashes=[target.geohash])])
+
+
+@event.listens_for(Record, 'after_update')
+def on_record_update(mapper, connection, target):
+    session = object_session(target)
+    if session is None:
+        return
+    history = inspect(target).attrs.status.history
+    if history.deleted and history.deleted[0] != target.status:
+        kind, old_status = 'status', history.deleted[0]
+    else:
+        # edits and finished background uploads
+        kind, old_status = 'updated', None
+    geohashes = [target.geohash, *inspect(target).attrs.geohash.history.deleted]
+    queue_events(session, [record_event(kind, target.id, target.user_id, target.status, old_status, geohashes)])
+
+
+@event.listens_for(Record, 'after_delete')
+def on_record_delete(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        queue_events(session, [record_event('deleted', target.id, target.user_id, target.status,
+                                            geohashes=[target.geohash])])
+
+
+@event.listens_for(Session, 'after_commit')
+def publish_queued_events(session):
+    events = session.info.pop('record_events', None)
+    if events:
+        try:
+            get_broker().publish(events)
+        except Exception as e:
+            # the commit stands; clients catch up with a reset
+            logger.error(f"Could not publish {len(events)} record events: {e}")
+
+
+@event.listens_for(Session, 'after_rollback')
+def discard_queued_events(session):
+    session.info.pop('record_events', None)
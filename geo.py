@@ -0,0 +1,122 @@
+import math
+from sqlalchemy import and_, func, or_, text
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+GEOHASH_PRECISION = 9  # ~5m cells
+MAX_COVER_CELLS = 16
+MAX_RADIUS_KM = 500
+KM_PER_DEGREE = 111.32
+
+_postgis = {}
+
+
+def encode_geohash(latitude, longitude, precision=GEOHASH_PRECISION):
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True
+    while len(chars) < precision:
+        rng, coord = (lon_range, longitude) if even else (lat_range, latitude)
+        mid = (rng[0] + rng[1]) / 2
+        if coord >= mid:
+            value = (value << 1) | 1
+            rng[0] = mid
+        else:
+            value <<= 1
+            rng[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[value])
+            bits = 0
+            value = 0
+    return ''.join(chars)
+
+
+def cell_size(precision):
+    """(lat, lon) size in degrees of a geohash cell."""
+    lon_bits = math.ceil(precision * 5 / 2)
+    lat_bits = precision * 5 // 2
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lon_bits
+
+
+def cover_bbox(min_lat, min_lon, max_lat, max_lon, max_cells=MAX_COVER_CELLS):
+    """
+    Geohash prefixes covering the box, using the finest precision that
+    needs at most `max_cells` cells. Returns [] when the box is too big
+    for any prefix to help.
+    """
+    best = []
+    for precision in range(1, GEOHASH_PRECISION + 1):
+        lat_step, lon_step = cell_size(precision)
+        rows = math.floor((max_lat + 90) / lat_step) - math.floor((min_lat + 90) / lat_step) + 1
+        cols = math.floor((max_lon + 180) / lon_step) - math.floor((min_lon + 180) / lon_step) + 1
+        if rows * cols > max_cells:
+            break
+        cells = set()
+        for r in range(rows):
+            lat = min(max_lat, math.floor((min_lat + 90) / lat_step) * lat_step - 90 + (r + 0.5) * lat_step)
+            for c in range(cols):
+                lon = min(max_lon, math.floor((min_lon + 180) / lon_step) * lon_step - 180 + (c + 0.5) * lon_step)
+                cells.add(encode_geohash(lat, lon, precision))
+        best = sorted(cells)
+    return best
+
+
+def prefix_filter(column, prefixes):
+    # Range scans instead of LIKE so the B-tree index is used on any collation
+    return or_(*[and_(column >= p, column < p + '{') for p in prefixes])
+
+
+def bbox_filter(model, min_lat, min_lon, max_lat, max_lon):
+    conditions = [
+        model.latitude.between(min_lat, max_lat),
+        model.longitude.between(min_lon, max_lon),
+    ]
+    prefixes = cover_bbox(min_lat, min_lon, max_lat, max_lon)
+    if prefixes:
+        conditions.insert(0, prefix_filter(model.geohash, prefixes))
+    return and_(*conditions)
+
+
+def radius_bbox(latitude, longitude, radius_km):
+    dlat = radius_km / KM_PER_DEGREE
+    dlon = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(latitude)), 0.01))
+    return (max(latitude - dlat, -90), max(longitude - dlon, -180),
+            min(latitude + dlat, 90), min(longitude + dlon, 180))
+
+
+def postgis_available(session):
+    bind = session.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return False
+    key = str(bind.url)
+    if key not in _postgis:
+        _postgis[key] = session.execute(
+            text("SELECT 1 FROM pg_extension WHERE extname = 'postgis'")
+        ).first() is not None
+    return _postgis[key]
+
+
+def point_geography(model):
+    # Must match the expression of the GiST index created by the migration
+    return func.geography(func.ST_SetSRID(func.ST_MakePoint(model.longitude, model.latitude), 4326))
+
+
+def radius_filter(model, session, latitude, longitude, radius_km):
+    if postgis_available(session):
+        center = func.geography(func.ST_SetSRID(func.ST_MakePoint(longitude, latitude), 4326))
+        return func.ST_DWithin(point_geography(model), center, radius_km * 1000)
+
+    # Geohash/bbox prefilter, then an equirectangular distance check that
+    # only needs arithmetic so it also runs on SQLite
+    scale = math.cos(math.radians(latitude))
+    dx = (model.longitude - longitude) * scale
+    dy = model.latitude - latitude
+    limit = (radius_km / KM_PER_DEGREE) ** 2
+    return and_(
+        bbox_filter(model, *radius_bbox(latitude, longitude, radius_km)),
+        dx * dx + dy * dy <= limit,
+    )
@@ -0,0 +1,112 @@
+"""
+Gunicorn settings, picked up automatically from the working directory:
+
+    gunicorn
+
+Everything can be overridden with the environment variables below or on the
+command line (`gunicorn -w 3 ...`).
+"""
+import os
+import sys
+import time
+import shutil
+import tempfile
+import multiprocessing
+
+_started = time.perf_counter()
+
+wsgi_app = os.getenv('GUNICORN_APP', 'app:create_app()')
+bind = f"0.0.0.0:{os.getenv('PORT', '5555')}"
+
+# gthread suits the I/O bound paths (uploads, streams, the database); gevent
+# needs `pip install gevent psycogreen` and patches the standard library
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', 1000))
+
+
+def default_workers():
+    cpus = multiprocessing.cpu_count()
+    # gevent handles concurrency inside each worker, one per CPU is enough
+    workers = cpus if worker_class == 'gevent' else 2 * cpus + 1
+    # each worker holds up to DB_POOL_SIZE + DB_MAX_OVERFLOW connections
+    return min(workers, int(os.getenv('GUNICORN_MAX_WORKERS', 8)))
+
+
+workers = int(os.getenv('WEB_CONCURRENCY') or default_workers())
+
+# Import the app once in the master and fork it, which shares the loaded
+# modules between workers and surfaces import errors before any fork.
+# gevent must patch before the app is imported, so it defaults to off there.
+preload_app = os.getenv('GUNICORN_PRELOAD', 'false' if worker_class == 'gevent' else 'true').lower() == 'true'
+
+# Recycle workers after this many requests (jittered so they don't all
+# restart at once), letting in-flight requests finish first
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 100))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+# /records/stream sends a heartbeat every SSE_HEARTBEAT seconds, well within this
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 60))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-')
+# gunicorn's default format with the path instead of the request line: query
+# strings can carry tokens (GET /records/stream?jwt=)
+access_log_format = '%(h)s %(l)s %(u)s %(t)s "%(m)s %(U)s %(H)s" %(s)s %(b)s "%(f)s" "%(a)s"'
+
+# Workers write their metrics here and /metrics adds them all up (metrics.py)
+metrics_dir = os.environ.setdefault('METRICS_DIR', os.path.join(tempfile.gettempdir(), f'jiseti-metrics-{os.getpid()}'))
+
+
+def on_starting(server):
+    # counters start from zero with the master
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir)
+
+
+def post_fork(server, worker):
+    # Pooled connections opened in a preloading master must not be shared with
+    # the children; close=False leaves the master's sockets alone. Without
+    # preload there is no inherited pool, and nothing may be imported here:
+    # post_fork runs before the gevent worker patches the standard library.
+    if not server.cfg.preload_app:
+        return
+    from models.baseModel import db
+    with worker.app.wsgi().app_context():
+        db.engine.dispose(close=False)
+
+
+def worker_exit(server, worker):
+    # runs in the worker; atexit handlers don't, so write its last metrics here
+    metrics = sys.modules.get('metrics')
+    if metrics is not None and metrics.store is not None:
+        metrics.store.flush()
+
+
+def child_exit(server, worker):
+    # keep the exited worker's counters in the totals, its gauges are gone
+    path = os.path.join(metrics_dir, f'worker-{worker.pid}.json')
+    if os.path.exists(path):
+        os.replace(path, os.path.join(metrics_dir, f'dead-{worker.pid}-{time.time_ns()}.json'))
+
+
+def when_ready(server):
+    cfg = server.cfg
+    server.log.info(f"Master ready in {time.perf_counter() - _started:.2f}s "
+                    f"({cfg.workers} {cfg.worker_class_str} workers, preload={cfg.preload_app})")
+    # background uploads of workers that died before this start are gone for
+    # good; without preload run `flask uploads-sweep` instead
+    if cfg.preload_app:
+        from uploads import fail_stale_uploads
+        try:
+            with server.app.wsgi().app_context():
+                failed = fail_stale_uploads()
+        except Exception as e:
+            server.log.error(f"Could not sweep pending uploads: {e}")
+        else:
+            if failed:
+                server.log.warning(f"Marked the images of {failed} records as failed")
+
+
+def post_worker_init(worker):
+    worker.log.info(f"Worker {worker.pid} ready {time.perf_counter() - _started:.2f}s after master start")
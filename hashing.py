@@ -0,0 +1,42 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from models.baseModel import bcrypt
+
+_executor = None
+_lock = threading.Lock()
+
+
+def get_executor():
+    """
+    Bounded pool for bcrypt. bcrypt releases the GIL, so threaded workers
+    hash on several cores at once, while the pool size caps how many
+    hashes run together during a login storm.
+    """
+    global _executor
+    with _lock:
+        if _executor is None:
+            workers = int(os.getenv('BCRYPT_THREADS', os.cpu_count() or 2))
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bcrypt')
+    return _executor
+
+
+def hash_password(password):
+    return get_executor().submit(bcrypt.generate_password_hash, password).result().decode('utf-8')
+
+
+def check_password(password_hash, password):
+    return get_executor().submit(bcrypt.check_password_hash, password_hash, password).result()
+
+
+def hash_rounds(password_hash):
+    # "$2b$12$<salt+hash>" -> 12
+    try:
+        return int(password_hash.split('$')[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+
+def needs_rehash(password_hash):
+    """True when the hash was made with a cost other than BCRYPT_LOG_ROUNDS."""
+    return hash_rounds(password_hash) != bcrypt._log_rounds
@@ -0,0 +1,115 @@
+import os
+import threading
+from cache import TTLCache
+import events
+
+# Seconds a cached response may be served; writes invalidate sooner
+RESPONSE_CACHE_TTL = int(os.getenv('RESPONSE_CACHE_TTL', 60))
+
+
+class MemoryBackend:
+    """Per-process LRU. Other workers only see a write within the TTL."""
+
+    def __init__(self, maxsize=2048, ttl=RESPONSE_CACHE_TTL):
+        self.entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def generation(self):
+        return self._generation
+
+    def bump(self):
+        with self._lock:
+            self._generation += 1
+
+    def get(self, key):
+        return self.entries.get(key)
+
+    def set(self, key, value):
+        self.entries.set(key, value)
+
+
+class RedisBackend:
+    """Shared by all workers. Any client with redis-py get/set/incr works."""
+
+    def __init__(self, client, prefix='jiseti:http:', ttl=RESPONSE_CACHE_TTL):
+        self.client = client
+        self.prefix = prefix
+        self.ttl = ttl
+
+    def generation(self):
+        return int(self.client.get(self.prefix + 'generation') or 0)
+
+    def bump(self):
+        self.client.incr(self.prefix + 'generation')
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        if value is None:
+            return None
+        etag, body = value.split(b'\n', 1)
+        return etag.decode('ascii'), body
+
+    def set(self, key, value):
+        etag, body = value
+        self.client.set(self.prefix + key, etag.encode('ascii') + b'\n' + body, ex=self.ttl)
+
+
+class ResponseCache:
+    """
+    Caches (etag, body) pairs. Every record write bumps a generation that is
+    part of each key, so a write drops all cached pages at once.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def lookup(self, key):
+        """Return (generation, cached value or None); pass the generation to store()."""
+        generation = self.backend.generation()
+        return generation, self.backend.get(f'{generation}:{key}')
+
+    def store(self, generation, key, etag, body):
+        # a write since lookup() already moved the generation on, so a
+        # page built from older rows is never served under the new one
+        self.backend.set(f'{generation}:{key}', (etag, body))
+
+    def invalidate(self, event=None):
+        self.backend.bump()
+
+
+_response_cache = None
+_lock = threading.Lock()
+
+
+def response_cache_enabled():
+    return os.getenv('RESPONSE_CACHE', 'false').lower() in ('1', 'true', 'yes')
+
+
+def get_response_cache():
+    """The shared ResponseCache, or None when RESPONSE_CACHE is off."""
+    global _response_cache
+    if not response_cache_enabled():
+        return None
+    with _lock:
+        if _response_cache is None:
+            url = os.getenv('RESPONSE_CACHE_URL')
+            if url:
+                import redis  # optional dependency, only needed for a shared cache
+                backend = RedisBackend(redis.Redis.from_url(url))
+            else:
+                backend = MemoryBackend()
+            _response_cache = ResponseCache(backend)
+            events.add_listener(_response_cache.invalidate)
+            # hear about writes made by other workers too
+            events.get_broker().start()
+    return _response_cache
+
+
+def set_response_cache(cache):
+    """Swap the cache, e.g. around another shared store."""
+    global _response_cache
+    with _lock:
+        if cache is not None:
+            events.add_listener(cache.invalidate)
+        _response_cache = cache
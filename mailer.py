@@ -0,0 +1,186 @@
+import os
+import time
+import smtplib
+import logging
+from datetime import timedelta
+from email.mime.text import MIMEText
+from email.mime.multipart import MIMEMultipart
+from sqlalchemy import update
+
+from models.baseModel import db
+from models.outboxModel import OutboxEmail, utcnow
+from metrics import timed
+
+logger = logging.getLogger(__name__)
+
+# How long a claimed batch is reserved for the worker that claimed it. Must
+# cover sending a whole batch; after that a crashed worker's emails are retried
+LEASE_SECONDS = int(os.getenv('OUTBOX_LEASE_SECONDS', 600))
+
+
+def build_message(sender_email, recipient_email, subject, body):
+    msg = MIMEMultipart()
+    msg['From'] = sender_email
+    msg['To'] = recipient_email
+    msg['Subject'] = subject
+    msg.attach(MIMEText(body, 'plain'))
+    return msg
+
+
+class SMTPMailer:
+    """
+    Keeps one SMTP connection open across sends and spaces sends out
+    to at most `rate_per_sec` messages per second.
+    """
+
+    def __init__(self, host, port, username=None, password=None, sender=None,
+                 use_tls=True, rate_per_sec=5.0, timeout=30):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.sender = sender or username
+        self.use_tls = use_tls
+        self.min_interval = 1.0 / rate_per_sec if rate_per_sec > 0 else 0
+        self.timeout = timeout
+        self._server = None
+        self._last_send = 0.0
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            host=os.getenv('SMTP_HOST', 'smtp.gmail.com'),
+            port=int(os.getenv('SMTP_PORT', 587)),
+            username=os.getenv('EMAIL_USER'),
+            password=os.getenv('EMAIL_PASSWORD'),
+            sender=os.getenv('EMAIL_SENDER'),
+            use_tls=os.getenv('SMTP_USE_TLS', 'true').lower() not in ('0', 'false', 'no'),
+            rate_per_sec=float(os.getenv('EMAIL_RATE_PER_SEC', 5)),
+        )
+
+    def _connect(self):
+        with timed('smtp', 'connect'):
+            server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            try:
+                if self.use_tls:
+                    server.starttls()
+                if self.username and self.password:
+                    server.login(self.username, self.password)
+            except Exception:
+                # a failed handshake would otherwise leak the socket on every retry
+                server.close()
+                raise
+        self._server = server
+
+    def _throttle(self):
+        wait = self._last_send + self.min_interval - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        self._last_send = time.monotonic()
+
+    def send(self, recipient_email, subject, body):
+        msg = build_message(self.sender, recipient_email, subject, body)
+        self._throttle()
+        if self._server is None:
+            self._connect()
+        try:
+            with timed('smtp', 'send'):
+                self._server.send_message(msg)
+        except smtplib.SMTPServerDisconnected:
+            # server closed the idle connection, reconnect once
+            self._connect()
+            with timed('smtp', 'send'):
+                self._server.send_message(msg)
+
+    def close(self):
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except smtplib.SMTPException:
+                pass
+            self._server = None
+
+
+def backoff_delay(attempts, base=30, cap=3600):
+    return timedelta(seconds=min(cap, base * 2 ** (attempts - 1)))
+
+
+def claim_batch(batch_size, lease):
+    """
+    Reserve up to `batch_size` due emails: count the attempt and move
+    next_attempt_at past the lease, then commit, so no row lock is held
+    while sending. Returns (id, attempts, recipient, subject, body) tuples.
+    """
+    # skip_locked lets several workers claim from the same table on Postgres
+    emails = (
+        OutboxEmail.query
+        .filter(OutboxEmail.status == 'pending', OutboxEmail.next_attempt_at <= utcnow())
+        .order_by(OutboxEmail.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    claimed = []
+    for email in emails:
+        email.attempts += 1
+        email.next_attempt_at = utcnow() + lease
+        claimed.append((email.id, email.attempts, email.recipient, email.subject, email.body))
+    db.session.commit()
+    return claimed
+
+
+def record_result(email_id, attempts, **values):
+    # a worker whose lease ran out may find the email claimed again (attempts
+    # moved on), that claim owns the row now
+    db.session.execute(
+        update(OutboxEmail)
+        .where(OutboxEmail.id == email_id, OutboxEmail.attempts == attempts)
+        .values(**values)
+    )
+    db.session.commit()
+
+
+def drain_outbox(mailer, batch_size=50, max_attempts=5):
+    """
+    Send one batch of due outbox emails.
+    Failed sends are retried with exponential backoff and marked 'dead'
+    after `max_attempts`. Returns the number of emails sent.
+    """
+    claimed = claim_batch(batch_size, timedelta(seconds=LEASE_SECONDS))
+
+    sent = 0
+    for email_id, attempts, recipient, subject, body in claimed:
+        try:
+            mailer.send(recipient, subject, body)
+        except Exception as e:
+            mailer.close()
+            if attempts >= max_attempts:
+                record_result(email_id, attempts, status='dead', last_error=str(e))
+                logger.error(f"Giving up on email {email_id} to {recipient}: {e}")
+            else:
+                record_result(email_id, attempts, last_error=str(e),
+                              next_attempt_at=utcnow() + backoff_delay(attempts))
+                logger.warning(f"Email {email_id} failed (attempt {attempts}): {e}")
+        else:
+            record_result(email_id, attempts, status='sent', sent_at=utcnow(), last_error=None)
+            sent += 1
+
+    return sent
+
+
+def run_worker(poll_interval=5, batch_size=50, max_attempts=5, once=False):
+    """Drain the outbox until stopped. Must run inside an app context."""
+    mailer = SMTPMailer.from_env()
+    try:
+        while True:
+            sent = drain_outbox(mailer, batch_size=batch_size, max_attempts=max_attempts)
+            if sent:
+                logger.info(f"Sent {sent} outbox emails")
+            if once:
+                return sent
+            if sent < batch_size:
+                # nothing left, drop the connection until there is work again
+                mailer.close()
+                time.sleep(poll_interval)
+    finally:
+        mailer.close()
@@ -0,0 +1,362 @@
+import os
+import glob
+import json
+import time
+import atexit
+import logging
+import threading
+from collections import Counter as Tally
+from contextlib import contextmanager
+from flask import Response, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+
+# Statements slower than this are logged with their SQL
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', 500))
+# The same statement run this many times in one request is flagged as N+1
+N_PLUS_ONE_THRESHOLD = int(os.getenv('N_PLUS_ONE_THRESHOLD', 10))
+
+# With several worker processes a scrape reaches only one of them. When
+# METRICS_DIR is set (gunicorn.conf.py does) each worker writes its values
+# there every METRICS_FLUSH_SECONDS and /metrics adds up all the workers.
+METRICS_DIR = os.getenv('METRICS_DIR')
+FLUSH_SECONDS = float(os.getenv('METRICS_FLUSH_SECONDS', 1))
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, **extra):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in [*zip(names, values), *extra.items()]]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values = Tally()
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(n, '') for n in self.labels)
+        with self._lock:
+            self._values[key] += amount
+
+    def series(self):
+        with self._lock:
+            return dict(self._values)
+
+    def merge(self, snapshots):
+        """Add up the series() of several processes."""
+        total = Tally()
+        for series, _ in snapshots:
+            for key, value in series.items():
+                total[key] += value
+        return total
+
+    def render(self, series=None):
+        yield f'# HELP {self.name} {self.help}'
+        yield f'# TYPE {self.name} counter'
+        for key, value in (self.series() if series is None else series).items():
+            yield f'{self.name}{_labels(self.labels, key)} {value}'
+
+
+class Histogram:
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        # label values -> [count per bucket..., sum, count]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(n, '') for n in self.labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def series(self):
+        with self._lock:
+            return {key: list(values) for key, values in self._series.items()}
+
+    def merge(self, snapshots):
+        """Add up the series() of several processes, bucket by bucket."""
+        total = {}
+        for series, _ in snapshots:
+            for key, values in series.items():
+                if key in total:
+                    total[key] = [a + b for a, b in zip(total[key], values)]
+                else:
+                    total[key] = list(values)
+        return total
+
+    def render(self, series=None):
+        yield f'# HELP {self.name} {self.help}'
+        yield f'# TYPE {self.name} histogram'
+        for key, values in (self.series() if series is None else series).items():
+            for bound, count in zip(self.buckets, values):
+                yield f'{self.name}_bucket{_labels(self.labels, key, le=bound)} {count}'
+            yield f'{self.name}_bucket{_labels(self.labels, key, le="+Inf")} {values[-1]}'
+            yield f'{self.name}_sum{_labels(self.labels, key)} {values[-2]}'
+            yield f'{self.name}_count{_labels(self.labels, key)} {values[-1]}'
+
+
+class Gauge:
+    """Read from `collect()` at scrape time: a number or {label values: number}."""
+
+    def __init__(self, name, help, collect, labels=()):
+        self.name = name
+        self.help = help
+        self.collect = collect
+        self.labels = labels
+
+    def series(self):
+        try:
+            values = self.collect()
+        except Exception as e:
+            logger.warning(f"Could not collect {self.name}: {e}")
+            return {}
+        if not isinstance(values, dict):
+            values = {(): values}
+        return {key if isinstance(key, tuple) else (key,): value for key, value in values.items()}
+
+    def merge(self, snapshots):
+        """One series per live process, told apart by a pid label."""
+        return {(*key, pid): value for series, pid in snapshots if pid for key, value in series.items()}
+
+    def render(self, series=None):
+        labels = self.labels if series is None else (*self.labels, 'pid')
+        series = self.series() if series is None else series
+        if not series:
+            return
+        yield f'# HELP {self.name} {self.help}'
+        yield f'# TYPE {self.name} gauge'
+        for key, value in series.items():
+            yield f'{self.name}{_labels(labels, key)} {value}'
+
+
+registry = []
+
+
+def register(metric):
+    registry.append(metric)
+    return metric
+
+
+def render():
+    lines = []
+    if METRICS_DIR:
+        store.flush()
+        snapshots = store.read()
+        for metric in registry:
+            lines.extend(metric.render(metric.merge(
+                [(files.get(metric.name, {}), pid) for files, pid in snapshots])))
+    else:
+        for metric in registry:
+            lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+class MultiprocessStore:
+    """
+    worker-<pid>.json in `directory` holds each live worker's series;
+    gunicorn renames the file of a worker that exits to dead-<pid>-<time>.json,
+    whose counters and histograms keep counting (without its gauges).
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def flush(self):
+        data = {metric.name: [[list(key), value] for key, value in metric.series().items()]
+                for metric in registry}
+        path = os.path.join(self.directory, f'worker-{os.getpid()}.json')
+        with self._lock:
+            with open(path + '.tmp', 'w') as f:
+                json.dump(data, f)
+            os.replace(path + '.tmp', path)
+
+    def read(self):
+        """[({metric name: {label values: value}}, pid or None when dead), ...]"""
+        snapshots = []
+        for path in glob.glob(os.path.join(self.directory, '*.json')):
+            name = os.path.basename(path)
+            try:
+                with open(path) as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                # renamed or being replaced meanwhile
+                continue
+            pid = name[len('worker-'):-len('.json')] if name.startswith('worker-') else None
+            snapshots.append(({metric: {tuple(key): value for key, value in series}
+                               for metric, series in data.items()}, pid))
+        return snapshots
+
+    def start(self):
+        """Flush periodically from this process (called on every request, cheap after the first)."""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            # a forked worker needs its own thread
+            self._pid = os.getpid()
+            os.makedirs(self.directory, exist_ok=True)
+            threading.Thread(target=self._run, name='metrics-flush', daemon=True).start()
+            # gunicorn workers exit without atexit, gunicorn.conf.py flushes in worker_exit
+            atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            time.sleep(FLUSH_SECONDS)
+            try:
+                self.flush()
+            except Exception as e:
+                logger.warning(f"Could not write metrics to {self.directory}: {e}")
+
+
+store = MultiprocessStore(METRICS_DIR) if METRICS_DIR else None
+
+
+request_latency = register(Histogram(
+    'http_request_duration_seconds', 'Request latency by endpoint and method',
+    labels=('endpoint', 'method', 'status')))
+request_queries = register(Histogram(
+    'http_request_sql_queries', 'SQL statements run per request',
+    labels=('endpoint', 'method'), buckets=QUERY_COUNT_BUCKETS))
+request_sql_time = register(Histogram(
+    'http_request_sql_seconds', 'Time spent in SQL per request',
+    labels=('endpoint', 'method')))
+sql_latency = register(Histogram(
+    'sql_query_duration_seconds', 'SQL statement latency', labels=('operation',)))
+slow_queries = register(Counter(
+    'sql_slow_queries_total', 'Statements slower than SLOW_QUERY_MS', labels=('operation',)))
+n_plus_one = register(Counter(
+    'sql_n_plus_one_total', 'Requests repeating one statement N_PLUS_ONE_THRESHOLD+ times',
+    labels=('endpoint', 'method')))
+external_latency = register(Histogram(
+    'external_call_duration_seconds', 'Outbound calls to other services',
+    labels=('service', 'operation', 'outcome')))
+
+
+@contextmanager
+def timed(service, operation):
+    """Time an outbound call, e.g. `with timed('cloudinary', 'upload'):`"""
+    start = time.perf_counter()
+    outcome = 'error'
+    try:
+        yield
+        outcome = 'ok'
+    finally:
+        external_latency.observe(time.perf_counter() - start,
+                                 service=service, operation=operation, outcome=outcome)
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # on the execution context, which goes away with the statement even when
+    # it fails and after_cursor_execute never runs
+    context._query_start = time.perf_counter()
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._query_start
+    operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ''
+    sql_latency.observe(elapsed, operation=operation)
+
+    if elapsed * 1000 >= SLOW_QUERY_MS:
+        slow_queries.inc(operation=operation)
+        where = f" during {request.method} {request.path}" if has_request_context() else ''
+        logger.warning(f"Slow query ({elapsed * 1000:.0f} ms){where}: {statement}")
+
+    if has_request_context() and 'sql_statements' in g:
+        g.sql_statements[statement] += 1
+        g.sql_seconds += elapsed
+
+
+def start_request():
+    if store is not None:
+        store.start()
+    g.request_start = time.perf_counter()
+    g.sql_statements = Tally()
+    g.sql_seconds = 0.0
+
+
+def finish_request(response):
+    if 'request_start' not in g:
+        return response
+    # streamed bodies (export) are measured up to the first byte
+    elapsed = time.perf_counter() - g.request_start
+    endpoint = request.endpoint or 'unmatched'
+    method = request.method
+    queries = sum(g.sql_statements.values())
+
+    request_latency.observe(elapsed, endpoint=endpoint, method=method, status=response.status_code)
+    request_queries.observe(queries, endpoint=endpoint, method=method)
+    request_sql_time.observe(g.sql_seconds, endpoint=endpoint, method=method)
+
+    if g.sql_statements:
+        statement, repeats = g.sql_statements.most_common(1)[0]
+        if repeats >= N_PLUS_ONE_THRESHOLD:
+            n_plus_one.inc(endpoint=endpoint, method=method)
+            logger.warning(f"Possible N+1 in {method} {request.path}: {repeats} x {statement}")
+
+    response.headers['Server-Timing'] = (
+        f'db;dur={g.sql_seconds * 1000:.1f};desc="{queries} queries", '
+        f'total;dur={elapsed * 1000:.1f}'
+    )
+    return response
+
+
+def metrics_view():
+    token = os.getenv('METRICS_TOKEN')
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return {'message': 'Unauthorized'}, 401
+    return Response(render(), mimetype='text/plain; version=0.0.4')
+
+
+def register_app_gauges(db):
+    if any(getattr(m, 'name', None) == 'db_pool_size' for m in registry):
+        # already registered by an earlier create_app()
+        return
+    from dbpool import pool_status
+    from ratelimit import login_limiter
+
+    def pool(field):
+        return lambda: pool_status(db.engine).get(field, 0)
+
+    register(Gauge('db_pool_size', 'Connections kept in the pool', pool('size')))
+    register(Gauge('db_pool_checked_out', 'Connections in use', pool('checked_out')))
+    register(Gauge('db_pool_overflow', 'Connections open beyond the pool size', pool('overflow')))
+    register(Gauge('db_pool_checkouts', 'Connection checkouts since start', pool('checkouts')))
+    register(Gauge('db_pool_timeouts', 'Checkouts that timed out waiting', pool('timeouts')))
+    register(Gauge('db_pool_wait_seconds_total', 'Time spent waiting for a connection',
+                   pool('wait_seconds_total')))
+    register(Gauge('login_attempts', 'Login rate limiter decisions since start',
+                   login_limiter.counters, labels=('result',)))
+
+
+def init_app(app, db):
+    app.before_request(start_request)
+    app.after_request(finish_request)
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
+    register_app_gauges(db)
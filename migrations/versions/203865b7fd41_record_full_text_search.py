@@ -0,0 +1,27 @@
+"""record full text search
+
+Revision ID: 203865b7fd41
+Revises: f6c86d3f3200
+Create Date: 2026-10-18 04:18:04.260281
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from search import install_search, uninstall_search
+
+
+# revision identifiers, used by Alembic.
+revision = '203865b7fd41'
+down_revision = 'f6c86d3f3200'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # tsvector column + trigger + GIN index on Postgres, FTS5 table on SQLite
+    install_search(op.get_bind())
+
+
+def downgrade():
+    uninstall_search(op.get_bind())
@@ -1,4 +1,7 @@
 from .userModel import User
 from .recordModel import Record
 from .notificationModel import Notification
+from .outboxModel import OutboxEmail
+from .statsModel import RecordStat
+from .recordEventModel import RecordEvent
 
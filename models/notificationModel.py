@@ -7,20 +7,43 @@ class Notification (db.Model, SerializerMixin):
 
     id = db.Column(db.Integer, primary_key=True)
     message = db.Column(db.Text, nullable=False)
-    approved_at = db.Column(db.DateTime(), default=datetime.now(timezone.utc))
+    # set by status_change when the record goes under investigation
+    approved_at = db.Column(db.DateTime(), nullable=True)
     resolved_at = db.Column(db.DateTime(), nullable=True)
+    created_at = db.Column(db.DateTime(), default=lambda: datetime.now(timezone.utc))
+    # null until the user marks it read
+    read_at = db.Column(db.DateTime(), nullable=True)
     
     # Serialize rules 
     serialize_rules = ('-user.notifications', '-record.notifications')
 
     #ForeignKeys
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
     record_id = db.Column(db.Integer, db.ForeignKey('records.id'), nullable=True)
 
     #Relationships
     user = db.relationship ('User', back_populates = 'notifications')
     record = db.relationship('Record', back_populates='notifications')
 
+    # unread counts per user
+    __table_args__ = (
+        db.Index('ix_notifications_user_id_read_at', 'user_id', 'read_at'),
+    )
+
+    @classmethod
+    def status_change(cls, record_id, user_id, title, old_status, new_status):
+        now = datetime.now(timezone.utc)
+        notification = cls(
+            message=f'The status of your record "{title}" changed from {old_status} to {new_status}',
+            user_id=user_id,
+            record_id=record_id,
+        )
+        if new_status == 'under investigation':
+            notification.approved_at = now
+        elif new_status == 'resolved':
+            notification.resolved_at = now
+        return notification
+
     @validates('message')
     def validate_message(self, key, message):
         if not message or len(message.strip()) < 1:
@@ -0,0 +1,37 @@
+from .baseModel import db
+from datetime import datetime, timezone
+
+
+def utcnow():
+    # outbox timestamps are compared in SQL, keep them naive UTC
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class OutboxEmail(db.Model):
+    __tablename__ = 'email_outbox'
+
+    id = db.Column(db.Integer, primary_key=True)
+    recipient = db.Column(db.String(150), nullable=False)
+    subject = db.Column(db.String(255), nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    status = db.Column(db.Enum('pending', 'sent', 'dead', name='outbox_status_enum'), nullable=False, default='pending')
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime(), nullable=False, default=utcnow)
+    next_attempt_at = db.Column(db.DateTime(), nullable=False, default=utcnow)
+    sent_at = db.Column(db.DateTime(), nullable=True)
+
+    # The worker polls pending rows that are due
+    __table_args__ = (
+        db.Index(None, 'status', 'next_attempt_at'),
+    )
+
+    @classmethod
+    def queue(cls, recipient, subject, body):
+        """
+        Add an email to the current session. It is only sent once the
+        caller commits, so it shares the transaction of the change it reports.
+        """
+        email = cls(recipient=recipient, subject=subject, body=body)
+        db.session.add(email)
+        return email
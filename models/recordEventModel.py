@@ -0,0 +1,40 @@
+from .baseModel import db
+from datetime import datetime, timezone
+
+
+def utcnow():
+    # event times are compared and subtracted in SQL, keep them naive UTC
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class RecordEvent(db.Model):
+    """
+    Append-only history of a record: one row per create, edit, status change
+    and delete, written by audit.py in the transaction of the change. Triggers
+    (audit.py) reject UPDATE and DELETE, and rows outlive their record, so
+    record_id has no foreign key.
+    """
+    __tablename__ = 'record_events'
+
+    id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True)
+    record_id = db.Column(db.Integer, nullable=False)
+    kind = db.Column(db.Enum('created', 'updated', 'status', 'deleted', name='record_event_kind_enum'), nullable=False)
+    # status after the change, and before it for status changes
+    status = db.Column(db.String(30), nullable=True)
+    old_status = db.Column(db.String(30), nullable=True)
+    # edited columns, {"title": [old, new], ...}
+    changes = db.Column(db.JSON, nullable=True)
+    version = db.Column(db.Integer, nullable=True)
+    # the record's owner and the user who made the change (None for background jobs)
+    user_id = db.Column(db.Integer, nullable=False)
+    actor_id = db.Column(db.Integer, nullable=True)
+    created_at = db.Column(db.DateTime(), nullable=False, default=utcnow)
+
+    __table_args__ = (
+        # a record's timeline in order
+        db.Index(None, 'record_id', 'id'),
+        # rows arrive in created_at order, so on Postgres a BRIN index stays a few
+        # pages for any number of rows and still narrows time ranges to the
+        # matching blocks; other databases get a btree
+        db.Index('ix_record_events_created_at', 'created_at', postgresql_using='brin'),
+    )
@@ -2,6 +2,8 @@ from .baseModel import db
 from datetime import datetime, timezone
 from sqlalchemy_serializer import SerializerMixin
 from sqlalchemy.orm import validates
+from sqlalchemy import event
+from geo import encode_geohash
 
 class Record (db.Model, SerializerMixin):
     __tablename__ = 'records'
@@ -10,17 +12,46 @@ class Record (db.Model, SerializerMixin):
     type = db.Column(db.Enum("Red-Flag", "Intervention", name="type_enum"), nullable=False)
     description = db.Column(db.Text, nullable=False)
     title = db.Column(db.String(100), nullable=False)
-    created_at = db.Column(db.DateTime(), default=datetime.now(timezone.utc))
-    updated_at = db.Column(db.DateTime(), onupdate=datetime.now(timezone.utc))
+    created_at = db.Column(db.DateTime(), default=lambda: datetime.now(timezone.utc))
+    # also the basis of the records API ETags, so it must move on every update
+    updated_at = db.Column(db.DateTime(), onupdate=lambda: datetime.now(timezone.utc))
     status = db.Column(db.Enum('pending','under investigation' ,'rejected', 'resolved', name="status_enum"), nullable=False, default="pending")
     latitude = db.Column(db.Float, nullable=True)
     longitude = db.Column(db.Float, nullable=True)
+    # geohash of (latitude, longitude), kept in sync by set_geohash below
+    geohash = db.Column(db.String(12), nullable=True, index=True)
     images = db.Column(db.JSON)  
+    # 'pending' while images are still uploading in the background
+    images_status = db.Column(db.String(20), nullable=False, default='ready', server_default='ready')
     #videos = db.Column(db.JSON)
+    # bumped on every update; ORM updates check it (version_id_col below),
+    # Core updates must set it to version + 1 themselves
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
 
     # Foreignkey
     user_id =db.Column (db.Integer, db.ForeignKey('users.id'), nullable=False)
 
+    # Indexes for the list filters (names come from the naming_convention)
+    __table_args__ = (
+        db.Index(None, 'user_id', 'created_at'),
+        db.Index(None, 'status', 'type', 'created_at'),
+    )
+
+    __mapper_args__ = {'version_id_col': version}
+
+    # Statuses a record can move to from its current status
+    STATUS_TRANSITIONS = {
+        'pending': ('under investigation', 'rejected', 'resolved'),
+        'under investigation': ('pending', 'rejected', 'resolved'),
+        'rejected': ('under investigation',),
+        'resolved': ('under investigation',),
+    }
+
+    @classmethod
+    def statuses_before(cls, status):
+        """Current statuses from which a record may move to `status`."""
+        return [old for old, new in cls.STATUS_TRANSITIONS.items() if status in new]
+
      # Serialize rules to prevent circular references
     serialize_rules = ('-user.records', '-notifications.record')
 
@@ -28,7 +59,7 @@ class Record (db.Model, SerializerMixin):
     user = db.relationship ('User', back_populates = 'records')
     notifications = db.relationship('Notification', back_populates='record', cascade="all, delete-orphan")
 
-    def __init__(self, title, description, type, latitude, longitude, images=None, status='pending',user_id=None, created_at=None, updated_at=None):
+    def __init__(self, title, description, type, latitude, longitude, images=None, status='pending',user_id=None, created_at=None, updated_at=None, images_status='ready'):
         self.title = title
         self.description = description
         self.type = type
@@ -38,6 +69,7 @@ class Record (db.Model, SerializerMixin):
         self.longitude = longitude
         #self.location_address = location_address
         self.images = images
+        self.images_status = images_status
         #  self.videos = videos
         self.created_at = created_at or datetime.now(timezone.utc)
         self.updated_at = updated_at or datetime.now(timezone.utc)
@@ -145,4 +177,12 @@ class Record (db.Model, SerializerMixin):
             return intervention_categories
         else:
             return []
-        
+
+
+@event.listens_for(Record, 'before_insert')
+@event.listens_for(Record, 'before_update')
+def set_geohash(mapper, connection, target):
+    if target.latitude is None or target.longitude is None:
+        target.geohash = None
+    else:
+        target.geohash = encode_geohash(target.latitude, target.longitude)
@@ -0,0 +1,15 @@
+from .baseModel import db
+
+
+class RecordStat(db.Model):
+    """
+    Precomputed record counters, one row per (dimension, key):
+    ('total', ''), ('status', 'pending'), ('type', 'Red-Flag'),
+    ('title', 'bribery'), ('day', '2025-07-01').
+    Maintained incrementally by stats.py.
+    """
+    __tablename__ = 'record_stats'
+
+    dimension = db.Column(db.String(20), primary_key=True)
+    key = db.Column(db.String(120), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
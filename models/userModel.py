@@ -1,4 +1,5 @@
-from .baseModel import db, bcrypt
+from .baseModel import db
+from hashing import hash_password
 from datetime import datetime, timezone
 from sqlalchemy_serializer import SerializerMixin
 from sqlalchemy.orm import validates
@@ -46,5 +47,5 @@ class User(db.Model, SerializerMixin):
         if not any(char.isdigit() for char in password):
             raise ValueError("Password must contain at least one digit")
         
-        self.password = bcrypt.generate_password_hash(password).decode('utf-8')
+        self.password = hash_password(password)
 
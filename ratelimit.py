@@ -0,0 +1,151 @@
+import os
+import time
+import threading
+from collections import Counter, OrderedDict
+
+
+class MemoryStore:
+    """Per-process counters in a bounded LRU. Fine for a single node."""
+
+    def __init__(self, maxsize=100000):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _live(self, key, now):
+        item = self._data.get(key)
+        if item is None:
+            return None
+        if item[1] <= now:
+            del self._data[key]
+            return None
+        return item
+
+    def get(self, key):
+        with self._lock:
+            item = self._live(key, time.time())
+            return item[0] if item else 0
+
+    def incr(self, key, ttl):
+        now = time.time()
+        with self._lock:
+            item = self._live(key, now)
+            count = item[0] + 1 if item else 1
+            expires_at = item[1] if item else now + ttl
+            self._data[key] = (count, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+            return count
+
+    def decr(self, key):
+        with self._lock:
+            item = self._live(key, time.time())
+            if item and item[0] > 0:
+                self._data[key] = (item[0] - 1, item[1])
+
+
+class RedisStore:
+    """
+    Shared counters for several nodes. Works with any client exposing the
+    redis-py get/incr/decr/expire calls, so tests can pass an in-memory fake.
+    """
+
+    def __init__(self, client, prefix='jiseti:rl:'):
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        return int(value) if value else 0
+
+    def incr(self, key, ttl):
+        key = self.prefix + key
+        count = self.client.incr(key)
+        if count == 1:
+            self.client.expire(key, int(ttl) + 1)
+        return count
+
+    def decr(self, key):
+        # only give back an attempt that is still counted: decr on an expired
+        # key would leave a -1 without a TTL
+        if self.get(key) > 0:
+            self.client.decr(self.prefix + key)
+
+
+def parse_limit(value):
+    """'5/300' -> (5 attempts, 300 seconds)"""
+    attempts, seconds = value.split('/')
+    return int(attempts), float(seconds)
+
+
+class RateLimiter:
+    """
+    Sliding window counter: the previous fixed window is weighted by how
+    much of it still overlaps the sliding window, which keeps one counter
+    per key and window instead of a timestamp per attempt.
+    """
+
+    def __init__(self, store, limits):
+        # limits: scope -> (attempts, window seconds)
+        self.store = store
+        self.limits = limits
+        self.stats = Counter()
+        self._stats_lock = threading.Lock()
+
+    def hit(self, **idents):
+        """
+        Count an attempt for each identity (e.g. ip=..., email=...) and return
+        the seconds to wait when that puts any of them over its limit, else
+        None. The limit is tested against the incremented counter, so
+        concurrent attempts can't all pass a check before any is counted.
+        """
+        now = time.time()
+        retry_after = None
+        for scope, ident in idents.items():
+            if ident is None:
+                continue
+            attempts, window = self.limits[scope]
+            index = int(now // window)
+            elapsed = (now % window) / window
+            previous = self.store.get(f'{scope}:{ident}:{index - 1}')
+            current = self.store.incr(f'{scope}:{ident}:{index}', ttl=2 * window)
+            if previous * (1 - elapsed) + current > attempts:
+                wait = max(1, int(window * (1 - elapsed)))
+                retry_after = max(retry_after or 0, wait)
+                self._record(f'{scope}_rejected')
+        self._record('rejected' if retry_after else 'allowed')
+        return retry_after
+
+    def forget(self, **idents):
+        """Give back the attempt hit() just counted, e.g. after a successful login."""
+        now = time.time()
+        for scope, ident in idents.items():
+            if ident is None:
+                continue
+            window = self.limits[scope][1]
+            self.store.decr(f'{scope}:{ident}:{int(now // window)}')
+
+    def _record(self, name):
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def counters(self):
+        with self._stats_lock:
+            return dict(self.stats)
+
+
+def store_from_env():
+    url = os.getenv('RATELIMIT_STORAGE_URL')
+    if url:
+        import redis  # optional dependency, only needed for a shared store
+        return RedisStore(redis.Redis.from_url(url))
+    return MemoryStore()
+
+
+login_limiter = RateLimiter(store_from_env(), {
+    # every attempt from an address costs a bcrypt check
+    'ip': parse_limit(os.getenv('LOGIN_LIMIT_IP', '20/60')),
+    # failed attempts against one account
+    'email': parse_limit(os.getenv('LOGIN_LIMIT_EMAIL', '5/300')),
+})
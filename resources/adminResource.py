@@ -1,17 +1,24 @@
 from flask_restful import Resource, reqparse
-from flask import current_app, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models.baseModel import db
 from models.userModel import User
+from auth import is_admin
 from models.recordModel import Record
+from models.outboxModel import OutboxEmail
+from models.notificationModel import Notification
+from serializers import format_record_with, json_response
+from etags import not_modified, not_modified_response
+from resources.recordQuery import (
+    CACHE_HEADERS, filter_records, if_match_versions, parse_include, record_etag,
+    record_list_response, record_loader_options, version_etag, QueryError,
+)
+from stats import count_status_changes
+from events import queue_events, record_event
+from audit import event_row, log_events
+from sqlalchemy import literal, select, update
 from datetime import datetime, timezone
-from utils import send_email_notification
 
-def is_admin(user_id):
-    user = User.query.get(user_id)
-    if (user and user.role == "admin"):
-        return True
-    return False
+records_table = Record.__table__
 
 class AdminResource(Resource):
     @jwt_required()
@@ -22,36 +29,25 @@ class AdminResource(Resource):
             return {'message': 'Admin access required'}, 403
 
         if record_id is not None:
-            record = Record.query.get(record_id)
+            try:
+                include = parse_include()
+            except QueryError as e:
+                return {'message': str(e)}, 400
+
+            record = db.session.get(Record, record_id, options=record_loader_options(include))
             if not record:
                 return {'message': 'Record not found'}, 404
-            return self.format_record(record), 200
-
-
-        page = request.args.get('page', 1, type=int)
-        per_page = min(request.args.get('per_page', 10, type=int), 100)
 
-        records = Record.query.all()
-
-        return {
-            'records': [self.format_record(r) for r in records],
-        }
-
-    def format_record(self, record):
-        return {
-            'id': record.id,
-            'type': record.type,
-            'title': record.title,
-            'description': record.description,
-            'latitude': record.latitude,
-            'longitude': record.longitude,
-            'images': record.images or [],
-            'status': record.status,
-            'created_at': record.created_at.isoformat() if record.created_at else None,
-            'updated_at': record.updated_at.isoformat() if record.updated_at else None,
-            'user_id': record.user_id
-        }
+            etag = record_etag(record, include)
+            if not_modified(etag):
+                return not_modified_response(etag, CACHE_HEADERS)
+            return json_response(format_record_with(record, include), headers={'ETag': etag, **CACHE_HEADERS})
 
+        try:
+            query = filter_records(Record.query)
+            return record_list_response(query, scope='all')
+        except QueryError as e:
+            return {'message': str(e)}, 400
 
     @jwt_required()
     def patch(self, record_id):
@@ -60,10 +56,6 @@ class AdminResource(Resource):
         if not is_admin(user_id):
             return {'message': 'Admin access required'}, 403
         
-        record = Record.query.get(record_id)
-        if not record:
-            return {'message': 'Record not found'}, 404
-        
         parser = reqparse.RequestParser()
         parser.add_argument('status', required=True, help='Status is required')
         #parser.add_argument('admin_comment', required=False)
@@ -73,38 +65,115 @@ class AdminResource(Resource):
         valid_statuses = ['pending', 'under investigation', 'rejected', 'resolved']
         if args['status'] not in valid_statuses:
             return {'message': 'Invalid status'}, 400
-        
+
+        versions = if_match_versions(record_id)
         try:
-            old_status = record.status
-            record.status = args['status']
-            
+            record = self.change_status(record_id, args['status'], versions)
+            if record is None:
+                db.session.rollback()
+                return self.status_not_changed(record_id, args['status'], versions)
+
             # if args.get('admin_comment'):
             #     record.admin_comment = args['admin_comment'].strip()
-            
-            record.updated_at = datetime.now(timezone.utc)
+
+            # inbox row and email in the same transaction, the email is sent by the outbox worker
+            self.send_notification(record, record.old_status, args['status'])
             db.session.commit()
             
-            self.send_notification(record, old_status, args['status'])
-            
-            return {
-                'message': f'Status updated from {old_status} to {args["status"]}',
-                'record': {
-                    'id': record.id,
-                    'title': record.title,
-                    'status': record.status,
-                    'user_id': record.user_id
-                }
-            }
-            
         except Exception as e:
             db.session.rollback()
             return {'message': f'Error updating status: {str(e)}'}, 500
+
+        return {
+            'message': f'Status updated from {record.old_status} to {args["status"]}',
+            'record': {
+                'id': record.id,
+                'title': record.title,
+                'status': args['status'],
+                'user_id': record.user_id,
+                'version': record.version,
+            }
+        }, 200, {'ETag': version_etag(record.id, record.version)}
+
+    def change_status(self, record_id, status, versions=None):
+        """
+        Move a record to `status` with one conditional UPDATE, if its current
+        status allows it (Record.STATUS_TRANSITIONS) and, when `versions` is
+        given, its version is one of them. Returns the updated row with its
+        old_status, or None when nothing matched.
+        """
+        allowed = Record.statuses_before(status)
+        if db.session.get_bind().dialect.name == 'postgresql':
+            # the CTE locks the row and keeps its old status for RETURNING
+            # (materialized, an inlined CTE would see the new status)
+            old = (
+                select(records_table.c.id, records_table.c.status)
+                .where(records_table.c.id == record_id)
+                .with_for_update()
+                .cte('old')
+                .prefix_with('MATERIALIZED')
+            )
+            conditions = [records_table.c.id == old.c.id, old.c.status.in_(allowed)]
+            old_status = old.c.status
+        else:
+            # SQLite can't return columns of the FROM tables: read the status
+            # and only update while it still is that status
+            current = db.session.execute(
+                select(records_table.c.status).where(records_table.c.id == record_id)
+            ).scalar()
+            if current not in allowed:
+                return None
+            conditions = [records_table.c.id == record_id, records_table.c.status == current]
+            old_status = literal(current)
+        if versions is not None:
+            conditions.append(records_table.c.version.in_(versions))
+
+        record = db.session.execute(
+            update(records_table)
+            .where(*conditions)
+            .values(status=status, version=records_table.c.version + 1,
+                    updated_at=datetime.now(timezone.utc))
+            .returning(records_table.c.id, records_table.c.user_id, records_table.c.title,
+                       records_table.c.geohash, records_table.c.version,
+                       old_status.label('old_status'))
+        ).first()
+        if record is None:
+            return None
+
+        # a Core UPDATE skips the ORM events, keep counters, history, tiles and streams in step
+        count_status_changes(db.session.connection(), [record.old_status], status)
+        log_events(db.session.connection(), [
+            event_row('status', record.id, record.user_id, status, record.old_status, version=record.version)
+        ])
+        queue_events(db.session(), [
+            record_event('status', record.id, record.user_id, status, record.old_status, [record.geohash])
+        ])
+        return record
+
+    def status_not_changed(self, record_id, status, versions):
+        """Response for a status UPDATE that matched no row."""
+        current = db.session.execute(
+            select(records_table.c.id, records_table.c.status, records_table.c.version)
+            .where(records_table.c.id == record_id)
+        ).first()
+        if current is None:
+            return {'message': 'Record not found'}, 404
+
+        headers = {'ETag': version_etag(current.id, current.version)}
+        if versions is not None and current.version not in versions:
+            return {'message': 'Record was changed by someone else, reload it and try again'}, 412, headers
+        if current.status == status:
+            return {'message': f'Status is already {status}'}, 200, headers
+        return {'message': f'Cannot change status from {current.status} to {status}'}, 409, headers
     
     def send_notification(self, record, old_status, new_status):
         if old_status == new_status:
             return
             
-        user = User.query.get(record.user_id)
+        db.session.add(Notification.status_change(
+            record.id, record.user_id, record.title, old_status, new_status))
+
+        user = db.session.get(User, record.user_id)
         if not user or not user.email:
             return
             
@@ -118,10 +187,6 @@ class AdminResource(Resource):
         
         """
         
-        try:
-            send_email_notification(user.email, subject, body)
-            # if user.phone:
-            #     send_sms_notification(user.phone, f"Record #{record.id} status updated to {new_status}")
-        except Exception as e:
-            # Log error but don't fail the request
-            current_app.logger.error(f"Failed to send notification: {str(e)}")
\ No newline at end of file
+        OutboxEmail.queue(user.email, subject, body)
+        # if user.phone:
+        #     send_sms_notification(user.phone, f"Record #{record.id} status updated to {new_status}")
\ No newline at end of file
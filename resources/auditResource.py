@@ -0,0 +1,55 @@
+from flask import request
+from flask_restful import Resource
+from flask_jwt_extended import jwt_required
+from sqlalchemy import select
+from models.baseModel import db
+from auth import current_user_id, is_admin
+from audit import events_table, format_event, time_to_resolution, timeline
+from serializers import json_response
+
+MAX_LIMIT = 200
+
+
+class RecordTimelineResource(Resource):
+    # GET /records/<id>/events?after=<event id>&limit=50, oldest first.
+    # Still readable after the record is deleted.
+    @jwt_required()
+    def get(self, record_id):
+        after = request.args.get('after', type=int)
+        limit = request.args.get('limit', 50, type=int)
+        if limit < 1:
+            return {'message': 'limit must be at least 1'}, 400
+        limit = min(limit, MAX_LIMIT)
+
+        # owner from the history itself, the record may be gone
+        owner_id = db.session.execute(
+            select(events_table.c.user_id).where(events_table.c.record_id == record_id).limit(1)
+        ).scalar()
+        if owner_id is None:
+            return {'message': 'Record not found'}, 404
+        if owner_id != current_user_id() and not is_admin():
+            return {'message': 'Unauthorized access'}, 403
+
+        # one extra row tells whether there is more
+        rows = timeline(record_id, after=after, limit=limit + 1)
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        return json_response({
+            'record_id': record_id,
+            'events': [format_event(row) for row in rows],
+            'next_after': rows[-1].id if has_more else None,
+        })
+
+
+class ResolutionTimeResource(Resource):
+    # GET /admin/stats/resolution?days=30
+    @jwt_required()
+    def get(self):
+        if not is_admin():
+            return {'message': 'Admin access required'}, 403
+
+        days = request.args.get('days', 30, type=int)
+        if not 1 <= days <= 366:
+            return {'message': 'days must be between 1 and 366'}, 400
+
+        return time_to_resolution(days)
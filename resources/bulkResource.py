@@ -0,0 +1,216 @@
+from collections import defaultdict
+from datetime import datetime, timezone
+from flask import request
+from flask_restful import Resource
+from flask_jwt_extended import jwt_required
+from sqlalchemy import select, update
+from models.baseModel import db
+from models.userModel import User
+from models.recordModel import Record
+from models.outboxModel import OutboxEmail
+from models.notificationModel import Notification
+from auth import current_user_id, is_admin
+from geo import encode_geohash
+from stats import count_inserted, count_status_changes
+from events import queue_events, record_event
+from audit import event_row, log_events
+
+MAX_IMPORT_ROWS = 1000
+MAX_STATUS_IDS = 500
+
+records_table = Record.__table__
+
+
+def parse_created_at(value):
+    if value is None:
+        return datetime.now(timezone.utc)
+    created_at = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    return created_at
+
+
+def validate_row(data, user_id):
+    """Run the Record validators on one import row and return column values."""
+    if not isinstance(data, dict):
+        raise ValueError('Each record must be an object')
+    if data.get('type') not in ['Red-Flag', 'Intervention']:
+        raise ValueError('Type must be Red-Flag or Intervention')
+    # a transient Record runs the same @validates checks as a single create
+    record = Record(
+        type=data.get('type'),
+        title=(data.get('title') or '').strip(),
+        description=(data.get('description') or '').strip(),
+        latitude=data.get('latitude'),
+        longitude=data.get('longitude'),
+        images=[],
+        status='pending',
+        user_id=user_id,
+        created_at=parse_created_at(data.get('created_at')),
+    )
+    return {
+        'type': record.type,
+        'title': record.title,
+        'description': record.description,
+        'latitude': record.latitude,
+        'longitude': record.longitude,
+        'geohash': encode_geohash(record.latitude, record.longitude)
+        if record.latitude is not None and record.longitude is not None else None,
+        'images': [],
+        'images_status': 'ready',
+        'status': 'pending',
+        'version': 1,
+        'user_id': user_id,
+        'created_at': record.created_at,
+        'updated_at': record.created_at,
+    }
+
+
+class BulkRecordResource(Resource):
+    # POST /records/bulk {"records": [...], "atomic": false}
+    @jwt_required()
+    def post(self):
+        data = request.get_json(silent=True) or {}
+        if not isinstance(data, dict):
+            return {'message': 'Request body must be a JSON object'}, 400
+        rows = data.get('records')
+        if not isinstance(rows, list) or not rows:
+            return {'message': 'records must be a non-empty list'}, 400
+        if len(rows) > MAX_IMPORT_ROWS:
+            return {'message': f'At most {MAX_IMPORT_ROWS} records per import'}, 400
+
+        user_id = current_user_id()
+        values, indexes, errors = [], [], []
+        for index, row in enumerate(rows):
+            try:
+                values.append(validate_row(row, user_id))
+                indexes.append(index)
+            except (ValueError, TypeError) as e:
+                errors.append({'index': index, 'error': str(e)})
+
+        if errors and data.get('atomic'):
+            return {'message': 'No records imported', 'errors': errors}, 400
+        if not values:
+            return {'message': 'No valid records to import', 'errors': errors}, 400
+
+        try:
+            # one executemany INSERT; ORM events don't run, so counters, the
+            # history and the record events (streams, caches, tiles) are done here.
+            # RETURNING rows come back in `values` order only when asked for
+            created = db.session.execute(
+                records_table.insert().returning(records_table.c.id, records_table.c.geohash,
+                                                 sort_by_parameter_order=True),
+                values,
+            ).all()
+            ids = [row.id for row in created]
+            count_inserted(db.session.connection(), values)
+            log_events(db.session.connection(), [
+                event_row('created', record_id, user_id, 'pending', version=1) for record_id in ids
+            ])
+            queue_events(db.session(), [
+                record_event('created', row.id, user_id, 'pending', geohashes=[row.geohash]) for row in created
+            ])
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            return {'message': f'Error importing records: {str(e)}'}, 500
+
+        return {
+            'message': f'Imported {len(ids)} records',
+            'ids': ids,
+            # which input row each id belongs to, rows listed in errors are skipped
+            'created': [{'index': index, 'id': record_id} for index, record_id in zip(indexes, ids)],
+            'errors': errors,
+        }, 201
+
+
+class BulkStatusResource(Resource):
+    # PATCH /admin/records/bulk {"record_ids": [...], "status": "..."}
+    @jwt_required()
+    def patch(self):
+        if not is_admin():
+            return {'message': 'Admin access required'}, 403
+
+        data = request.get_json(silent=True) or {}
+        if not isinstance(data, dict):
+            return {'message': 'Request body must be a JSON object'}, 400
+        record_ids = data.get('record_ids')
+        status = data.get('status')
+
+        if status not in Record.status.type.enums:
+            return {'message': 'Invalid status'}, 400
+        if (not isinstance(record_ids, list) or not record_ids
+                or not all(isinstance(i, int) and not isinstance(i, bool) for i in record_ids)):
+            return {'message': 'record_ids must be a non-empty list of integers'}, 400
+        if len(record_ids) > MAX_STATUS_IDS:
+            return {'message': f'At most {MAX_STATUS_IDS} records per update'}, 400
+
+        try:
+            # lock the rows that may move to `status` (Record.STATUS_TRANSITIONS)
+            # and keep their old status for counters and emails
+            current = db.session.execute(
+                select(Record.id, Record.status, Record.user_id, Record.title, Record.geohash)
+                .where(Record.id.in_(record_ids), Record.status.in_(Record.statuses_before(status)))
+                .with_for_update()
+            ).all()
+
+            if current:
+                # the status filter again for databases without row locks (SQLite),
+                # where a record may have moved on since the SELECT
+                versions = dict(db.session.execute(
+                    update(records_table)
+                    .where(records_table.c.id.in_([r.id for r in current]),
+                           records_table.c.status.in_(Record.statuses_before(status)))
+                    .values(status=status, version=records_table.c.version + 1,
+                            updated_at=datetime.now(timezone.utc))
+                    .returning(records_table.c.id, records_table.c.version)
+                ).all())
+                # bookkeeping only for the rows the UPDATE changed
+                current = [r for r in current if r.id in versions]
+                count_status_changes(db.session.connection(), [r.status for r in current], status)
+                log_events(db.session.connection(), [
+                    event_row('status', r.id, r.user_id, status, r.status, version=versions[r.id])
+                    for r in current
+                ])
+                queue_events(db.session(), [
+                    record_event('status', r.id, r.user_id, status, r.status, [r.geohash]) for r in current
+                ])
+                db.session.add_all(
+                    Notification.status_change(r.id, r.user_id, r.title, r.status, status)
+                    for r in current
+                )
+                self.queue_digests(current, status)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            return {'message': f'Error updating status: {str(e)}'}, 500
+
+        updated = {r.id for r in current}
+        return {
+            'message': f'Updated {len(updated)} records to {status}',
+            'updated': sorted(updated),
+            'unchanged': sorted(set(record_ids) - updated),
+        }
+
+    def queue_digests(self, changes, new_status):
+        """One email per reporter listing all of their records that changed."""
+        by_user = defaultdict(list)
+        for change in changes:
+            by_user[change.user_id].append(change)
+
+        users = User.query.filter(User.id.in_(by_user)).all()
+        for user in users:
+            if not user.email:
+                continue
+            lines = "\n".join(
+                f'         - #{c.id} "{c.title}": {c.status} -> {new_status}' for c in by_user[user.id]
+            )
+            subject = f"Status Update for {len(by_user[user.id])} of your records"
+            body = f"""
+        Hello {user.username},
+
+        The status of the following records has been updated:
+{lines}
+
+        """
+            OutboxEmail.queue(user.email, subject, body)
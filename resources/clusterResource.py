@@ -0,0 +1,128 @@
+import os
+import math
+import threading
+from flask import request
+from flask_restful import Resource
+from flask_jwt_extended import jwt_required
+from sqlalchemy import func, select
+from models.baseModel import db
+from models.recordModel import Record
+from auth import current_user_id, is_admin
+from cache import TTLCache
+from serializers import json_response
+from resources.recordQuery import filter_records, QueryError
+import events
+import geo
+
+MAX_ZOOM = 20
+# Cells per tile side the counts are grouped into
+CELLS_PER_TILE = 8
+# Record changes bump a version for each geohash prefix up to this length
+VERSION_PRECISION = 3
+
+cluster_cache = TTLCache(maxsize=2048, ttl=int(os.getenv('CLUSTER_CACHE_TTL', 300)))
+_versions = {}
+_versions_lock = threading.Lock()
+
+
+def tile_bbox(z, x, y):
+    """(min_lat, min_lon, max_lat, max_lon) of a web mercator tile."""
+    n = 2 ** z
+
+    def lat(row):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
+
+    return lat(y + 1), x / n * 360 - 180, lat(y), (x + 1) / n * 360 - 180
+
+
+def precision_for_zoom(z):
+    tile_width = 360 / 2 ** z
+    for precision in range(1, geo.GEOHASH_PRECISION + 1):
+        if geo.cell_size(precision)[1] <= tile_width / CELLS_PER_TILE:
+            return precision
+    return geo.GEOHASH_PRECISION
+
+
+def version_keys(bbox):
+    """Geohash prefixes (at most VERSION_PRECISION long) whose changes affect the box."""
+    prefixes = {p[:VERSION_PRECISION] for p in geo.cover_bbox(*bbox)}
+    return sorted(prefixes) or ['']
+
+
+def current_versions(keys):
+    with _versions_lock:
+        return tuple(_versions.get(key, 0) for key in keys)
+
+
+def bump_versions(geohashes):
+    with _versions_lock:
+        for geohash in geohashes:
+            for length in range(VERSION_PRECISION + 1):
+                key = geohash[:length]
+                _versions[key] = _versions.get(key, 0) + 1
+
+
+def invalidate_changed_cells(event):
+    # record events carry the old and new geohash of the record. With
+    # EVENT_BROKER=postgres they also arrive from the other workers.
+    if event.get('geohashes'):
+        bump_versions(event['geohashes'])
+
+
+events.add_listener(invalidate_changed_cells)
+
+
+class ClusterResource(Resource):
+    # GET /records/clusters/<z>/<x>/<y>
+    @jwt_required()
+    def get(self, z, x, y):
+        if not 0 <= z <= MAX_ZOOM or not 0 <= x < 2 ** z or not 0 <= y < 2 ** z:
+            return {'message': 'Invalid tile'}, 400
+
+        # hear about writes made by other workers
+        events.get_broker().start()
+
+        bbox = tile_bbox(z, x, y)
+        precision = precision_for_zoom(z)
+        admin = is_admin()
+        scope = 'all' if admin else current_user_id()
+        keys = version_keys(bbox)
+        cache_key = (z, x, y, scope, tuple(sorted(request.args.items(multi=True))))
+
+        cached = cluster_cache.get(cache_key)
+        if cached and cached[0] == current_versions(keys):
+            return json_response(cached[1])
+
+        versions = current_versions(keys)
+        cell = func.substr(Record.geohash, 1, precision).label('cell')
+        query = (
+            select(
+                cell, Record.type, Record.status,
+                func.count().label('count'),
+                func.avg(Record.latitude).label('latitude'),
+                func.avg(Record.longitude).label('longitude'),
+            )
+            .where(geo.bbox_filter(Record, *bbox))
+            .group_by(cell, Record.type, Record.status)
+        )
+        if not admin:
+            query = query.where(Record.user_id == current_user_id())
+        try:
+            query = filter_records(query, allow_user_filter=admin)
+        except QueryError as e:
+            return {'message': str(e)}, 400
+
+        payload = {
+            'tile': {'z': z, 'x': x, 'y': y},
+            'precision': precision,
+            'clusters': [{
+                'cell': row.cell,
+                'type': row.type,
+                'status': row.status,
+                'count': row.count,
+                'latitude': row.latitude,
+                'longitude': row.longitude,
+            } for row in db.session.execute(query)],
+        }
+        cluster_cache.set(cache_key, (versions, payload))
+        return json_response(payload)
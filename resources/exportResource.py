@@ -0,0 +1,94 @@
+import io
+import csv
+from flask import Response, request, stream_with_context
+from flask_restful import Resource
+from flask_jwt_extended import jwt_required
+from sqlalchemy import select
+from models.baseModel import db
+from models.userModel import User
+from models.recordModel import Record
+from auth import is_admin
+from serializers import RECORD_COLUMNS, format_record, dumps
+from resources.recordQuery import filter_records, is_descending, QueryError
+
+BATCH_SIZE = 1000
+
+REPORTER_COLUMNS = (
+    User.username.label('reporter_username'),
+    User.email.label('reporter_email'),
+    User.first_name.label('reporter_first_name'),
+    User.last_name.label('reporter_last_name'),
+)
+
+CSV_FIELDS = [
+    'id', 'type', 'title', 'description', 'latitude', 'longitude', 'images',
+    'images_status', 'status', 'created_at', 'updated_at', 'user_id', 'version',
+    'reporter_username', 'reporter_email', 'reporter_first_name', 'reporter_last_name',
+]
+
+
+def export_row(row):
+    data = format_record(row)
+    data['reporter_username'] = row.reporter_username
+    data['reporter_email'] = row.reporter_email
+    data['reporter_first_name'] = row.reporter_first_name
+    data['reporter_last_name'] = row.reporter_last_name
+    return data
+
+
+def ndjson_chunks(result):
+    for rows in result.partitions():
+        yield b''.join(dumps(export_row(row)) + b'\n' for row in rows)
+
+
+def csv_chunks(result):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_FIELDS)
+    writer.writeheader()
+    for rows in result.partitions():
+        for row in rows:
+            data = export_row(row)
+            data['images'] = ' '.join(data['images'])
+            writer.writerow(data)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    # header only when there were no rows
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+class ExportResource(Resource):
+    # GET /admin/records/export?format=ndjson|csv
+    @jwt_required()
+    def get(self):
+        if not is_admin():
+            return {'message': 'Admin access required'}, 403
+
+        export_format = request.args.get('format', 'ndjson').lower()
+        if export_format not in ('ndjson', 'csv'):
+            return {'message': 'format must be ndjson or csv'}, 400
+
+        query = select(*RECORD_COLUMNS, *REPORTER_COLUMNS).join(User, Record.user_id == User.id)
+        try:
+            query = filter_records(query)
+            if is_descending():
+                query = query.order_by(Record.created_at.desc(), Record.id.desc())
+            else:
+                query = query.order_by(Record.created_at.asc(), Record.id.asc())
+        except QueryError as e:
+            return {'message': str(e)}, 400
+
+        # yield_per streams from a server-side cursor in fixed-size batches
+        result = db.session.execute(query.execution_options(yield_per=BATCH_SIZE))
+
+        if export_format == 'csv':
+            body, mimetype = csv_chunks(result), 'text/csv'
+        else:
+            body, mimetype = ndjson_chunks(result), 'application/x-ndjson'
+
+        return Response(
+            stream_with_context(body),
+            mimetype=mimetype,
+            headers={'Content-Disposition': f'attachment; filename=records.{export_format}'}
+        )
@@ -1,20 +1,19 @@
 from flask import request
 from flask_restful import Resource
 from models.userModel import User
-from flask_bcrypt import Bcrypt
+from auth import current_user
+from models.baseModel import db
+from hashing import check_password, hash_password, needs_rehash
+from ratelimit import login_limiter
 from flask_jwt_extended import create_access_token
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
 from flask import jsonify
 
 
-bcrypt = Bcrypt()
-
-
 class LoginResource(Resource):
     @jwt_required()
     def get(self):
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        user = current_user()
 
         if not user:
             return ({"error": "User not found"}), 404
@@ -30,19 +29,39 @@ class LoginResource(Resource):
     
     def post(self):
         data = request.get_json()
+        if not isinstance(data, dict):
+            return {"error": "Request body must be a JSON object"}, 400
         email = data.get("email")
         password = data.get("password")
 
         if not email or not password:
             return {"error": "Email & password cannot be empty"}, 400
+        if not isinstance(email, str) or not isinstance(password, str):
+            return {"error": "Email & password must be strings"}, 400
+
+        # throttle before any DB lookup or bcrypt work; every attempt counts
+        # against the account until it succeeds (see forget below)
+        ip = request.remote_addr
+        email_key = email.strip().lower()
+        retry_after = login_limiter.hit(ip=ip, email=email_key)
+        if retry_after:
+            return {"error": "Too many login attempts, try again later"}, 429, {"Retry-After": str(retry_after)}
         
         # find user by email
         user = User.query.filter_by(email=email).first()
 
-        if user and bcrypt.check_password_hash(user.password, password):
+        if user and check_password(user.password, password):
+            # only failed attempts count against the account
+            login_limiter.forget(email=email_key)
+
+            # upgrade hashes made with an old BCRYPT_LOG_ROUNDS while we have the password
+            if needs_rehash(user.password):
+                user.password = hash_password(password)
+                db.session.commit()
 
             # generate access token
-            access_token = create_access_token(identity=str(user.id))
+            # role claim saves clients a /profile call, the server re-checks it (see auth.get_role)
+            access_token = create_access_token(identity=str(user.id), additional_claims={"role": user.role})
             return {
                 "access_token": access_token,
                 "user": {
@@ -0,0 +1,172 @@
+import os
+from datetime import datetime, timezone
+from flask import request
+from flask_restful import Resource
+from flask_jwt_extended import jwt_required
+from sqlalchemy import event, func, select, update
+from sqlalchemy.orm import Session, object_session
+from models.baseModel import db
+from models.notificationModel import Notification
+from auth import current_user_id
+from cache import TTLCache
+from etags import make_etag, not_modified, not_modified_response
+from serializers import NOTIFICATION_COLUMNS, format_notification, json_response
+
+MAX_LIMIT = 100
+MAX_READ_IDS = 500
+# Clients revalidate every poll; the ETag answers unchanged inboxes with a 304
+CACHE_HEADERS = {'Cache-Control': 'private, no-cache'}
+
+# user id -> (total, unread, latest id). Dropped on this worker when the
+# user's notifications change; other workers catch up within the TTL.
+inbox_cache = TTLCache(maxsize=10000, ttl=int(os.getenv('INBOX_CACHE_TTL', 5)))
+
+notifications_table = Notification.__table__
+
+
+def inbox_state(user_id):
+    state = inbox_cache.get(user_id)
+    if state is None:
+        row = db.session.execute(
+            select(
+                func.count(Notification.id),
+                func.count(Notification.id).filter(Notification.read_at.is_(None)),
+                func.max(Notification.id),
+            ).where(Notification.user_id == user_id)
+        ).one()
+        state = (row[0], row[1], row[2] or 0)
+        inbox_cache.set(user_id, state)
+    return state
+
+
+@event.listens_for(Notification, 'after_insert')
+@event.listens_for(Notification, 'after_update')
+@event.listens_for(Notification, 'after_delete')
+def track_changed_inbox(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        mark_changed_inboxes(session, [target.user_id])
+
+
+def mark_changed_inboxes(session, user_ids):
+    """Drop the cached inbox state of these users once `session` commits."""
+    session.info.setdefault('changed_inboxes', set()).update(user_ids)
+
+
+@event.listens_for(Session, 'after_commit')
+def invalidate_changed_inboxes(session):
+    for user_id in session.info.pop('changed_inboxes', ()):
+        inbox_cache.delete(user_id)
+
+
+@event.listens_for(Session, 'after_rollback')
+def discard_changed_inboxes(session):
+    session.info.pop('changed_inboxes', None)
+
+
+class NotificationResource(Resource):
+    # GET /notifications?since=<id> polls for newer ones, oldest first;
+    # without since, newest first and ?before=<id> for older pages
+    @jwt_required()
+    def get(self):
+        user_id = current_user_id()
+        since = request.args.get('since', type=int)
+        before = request.args.get('before', type=int)
+        limit = request.args.get('limit', 20, type=int)
+        unread_only = request.args.get('unread', '').lower() in ('1', 'true', 'yes')
+
+        if limit < 1:
+            return {'message': 'limit must be at least 1'}, 400
+        if since is not None and before is not None:
+            return {'message': 'Use either since or before'}, 400
+        limit = min(limit, MAX_LIMIT)
+
+        total, unread, latest_id = inbox_state(user_id)
+        etag = make_etag(user_id, total, unread, latest_id, sorted(request.args.items(multi=True)))
+        if not_modified(etag):
+            return not_modified_response(etag, CACHE_HEADERS)
+
+        query = select(*NOTIFICATION_COLUMNS, Notification.created_at, Notification.read_at).where(
+            Notification.user_id == user_id)
+        if unread_only:
+            query = query.where(Notification.read_at.is_(None))
+        if since is not None:
+            query = query.where(Notification.id > since).order_by(Notification.id.asc())
+        else:
+            if before is not None:
+                query = query.where(Notification.id < before)
+            query = query.order_by(Notification.id.desc())
+
+        # one extra row tells whether there is more
+        rows = db.session.execute(query.limit(limit + 1)).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        notifications = []
+        for row in rows:
+            notification = format_notification(row)
+            notification['created_at'] = row.created_at.isoformat() if row.created_at else None
+            notification['read_at'] = row.read_at.isoformat() if row.read_at else None
+            notifications.append(notification)
+
+        payload = {'notifications': notifications, 'unread': unread, 'has_more': has_more}
+        if since is not None:
+            # poll again with this, it stays put when nothing new arrived
+            payload['next_since'] = rows[-1].id if rows else since
+        else:
+            payload['next_before'] = rows[-1].id if has_more else None
+        return json_response(payload, headers={'ETag': etag, **CACHE_HEADERS})
+
+
+class UnreadCountResource(Resource):
+    # GET /notifications/unread-count, served from inbox_cache
+    @jwt_required()
+    def get(self):
+        user_id = current_user_id()
+        total, unread, latest_id = inbox_state(user_id)
+        etag = make_etag(user_id, unread, latest_id)
+        if not_modified(etag):
+            return not_modified_response(etag, CACHE_HEADERS)
+        return json_response({'unread': unread, 'latest_id': latest_id},
+                             headers={'ETag': etag, **CACHE_HEADERS})
+
+
+class NotificationReadResource(Resource):
+    # POST /notifications/read {"ids": [...]} or {"up_to": <id>} or {"all": true}
+    @jwt_required()
+    def post(self):
+        user_id = current_user_id()
+        data = request.get_json(silent=True) or {}
+        if not isinstance(data, dict):
+            return {'message': 'Request body must be a JSON object'}, 400
+        ids = data.get('ids')
+        up_to = data.get('up_to')
+
+        query = (
+            update(notifications_table)
+            .where(notifications_table.c.user_id == user_id, notifications_table.c.read_at.is_(None))
+            .values(read_at=datetime.now(timezone.utc))
+        )
+        if ids is not None:
+            if (not isinstance(ids, list) or not ids
+                    or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids)):
+                return {'message': 'ids must be a non-empty list of integers'}, 400
+            if len(ids) > MAX_READ_IDS:
+                return {'message': f'At most {MAX_READ_IDS} ids per request'}, 400
+            query = query.where(notifications_table.c.id.in_(ids))
+        elif isinstance(up_to, int) and not isinstance(up_to, bool):
+            query = query.where(notifications_table.c.id <= up_to)
+        elif data.get('all') is not True:
+            return {'message': 'Pass ids, up_to or all'}, 400
+
+        try:
+            updated = db.session.execute(query).rowcount
+            # Core UPDATE, so the mapper events above don't see it
+            mark_changed_inboxes(db.session(), [user_id])
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            return {'message': f'Error updating notifications: {str(e)}'}, 500
+
+        total, unread, latest_id = inbox_state(user_id)
+        return {'updated': updated, 'unread': unread}
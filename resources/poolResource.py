@@ -0,0 +1,14 @@
+from flask_restful import Resource
+from flask_jwt_extended import jwt_required
+from models.baseModel import db
+from auth import is_admin
+from dbpool import pool_status
+
+
+class PoolResource(Resource):
+    # GET /admin/pool: connection pool usage for this worker
+    @jwt_required()
+    def get(self):
+        if not is_admin():
+            return {'message': 'Admin access required'}, 403
+        return pool_status(db.engine)
@@ -0,0 +1,13 @@
+from flask_restful import Resource
+from flask_jwt_extended import jwt_required
+from auth import is_admin
+from ratelimit import login_limiter
+
+
+class RateLimitResource(Resource):
+    # GET /admin/ratelimit: allowed/rejected login attempt counters for this worker
+    @jwt_required()
+    def get(self):
+        if not is_admin():
+            return {'message': 'Admin access required'}, 403
+        return {'login': login_limiter.counters()}
@@ -0,0 +1,354 @@
+import base64
+from collections import defaultdict
+from datetime import datetime, timezone
+from urllib.parse import urlencode
+from flask import current_app, request
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.orm import joinedload, selectinload
+from models.baseModel import db
+from models.recordModel import Record
+from models.userModel import User
+from models.notificationModel import Notification
+import geo
+from search import apply_search, render_highlight
+from etags import make_etag, not_modified, not_modified_response
+from httpcache import get_response_cache
+from serializers import (
+    NOTIFICATION_COLUMNS, RECORD_COLUMNS, USER_SUMMARY_COLUMNS,
+    dumps, format_notification, format_record, format_user_summary,
+)
+
+MAX_PER_PAGE = 100
+# Relations that can be requested with ?include=
+INCLUDES = ('user', 'notifications')
+# Clients may keep responses but must revalidate them with If-None-Match
+CACHE_HEADERS = {'Cache-Control': 'private, no-cache'}
+
+
+class QueryError(ValueError):
+    pass
+
+
+def encode_cursor(record):
+    # cursor = last seen (created_at, id), opaque to the client
+    raw = f"{record.created_at.isoformat()}|{record.id}"
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+        created_at, record_id = raw.rsplit('|', 1)
+        return datetime.fromisoformat(created_at), int(record_id)
+    except (ValueError, UnicodeError):
+        raise QueryError('Invalid cursor')
+
+
+def parse_bool(value, default):
+    if value is None:
+        return default
+    return value.strip().lower() not in ('0', 'false', 'no', 'off')
+
+
+def parse_datetime(name):
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        raise QueryError(f'{name} must be an ISO 8601 date or datetime')
+    # created_at is stored as naive UTC
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def filter_records(query, allow_user_filter=True):
+    """
+    Apply the list filters from the query string:
+    status, type, title, user_id, created_from, created_to.
+    Raises QueryError on invalid values.
+    """
+    status = request.args.get('status')
+    if status:
+        if status not in Record.status.type.enums:
+            raise QueryError(f"status must be one of: {', '.join(Record.status.type.enums)}")
+        query = query.filter(Record.status == status)
+
+    record_type = request.args.get('type')
+    if record_type:
+        if record_type not in Record.type.type.enums:
+            raise QueryError(f"type must be one of: {', '.join(Record.type.type.enums)}")
+        query = query.filter(Record.type == record_type)
+
+    # titles are stored normalized to lower case (see Record.validate_title)
+    title = request.args.get('title')
+    if title:
+        query = query.filter(Record.title == title.strip().lower())
+
+    if allow_user_filter:
+        user_id = request.args.get('user_id', type=int)
+        if user_id is not None:
+            query = query.filter(Record.user_id == user_id)
+
+    created_from = parse_datetime('created_from')
+    if created_from:
+        query = query.filter(Record.created_at >= created_from)
+
+    created_to = parse_datetime('created_to')
+    if created_to:
+        query = query.filter(Record.created_at <= created_to)
+
+    return filter_location(query)
+
+
+def parse_floats(value, name, count):
+    try:
+        numbers = [float(part) for part in value.split(',')]
+    except ValueError:
+        numbers = []
+    if len(numbers) != count:
+        raise QueryError(f'{name} must be {count} comma separated numbers')
+    return numbers
+
+
+def filter_location(query):
+    """
+    bbox=min_lon,min_lat,max_lon,max_lat (GeoJSON order) or
+    lat=..&lon=..&radius_km=.. for records around a point.
+    """
+    bbox = request.args.get('bbox')
+    if bbox:
+        min_lon, min_lat, max_lon, max_lat = parse_floats(bbox, 'bbox', 4)
+        if not (-90 <= min_lat <= max_lat <= 90 and -180 <= min_lon <= max_lon <= 180):
+            raise QueryError('bbox must be min_lon,min_lat,max_lon,max_lat within valid ranges')
+        query = query.filter(geo.bbox_filter(Record, min_lat, min_lon, max_lat, max_lon))
+
+    radius_km = request.args.get('radius_km', type=float)
+    if radius_km is not None:
+        lat = request.args.get('lat', type=float)
+        lon = request.args.get('lon', type=float)
+        if lat is None or lon is None:
+            raise QueryError('lat and lon are required with radius_km')
+        if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+            raise QueryError('lat/lon out of range')
+        if not 0 < radius_km <= geo.MAX_RADIUS_KM:
+            raise QueryError(f'radius_km must be between 0 and {geo.MAX_RADIUS_KM}')
+        query = query.filter(geo.radius_filter(Record, db.session, lat, lon, radius_km))
+
+    return query
+
+
+def parse_include():
+    value = request.args.get('include') or ''
+    include = {part.strip() for part in value.split(',') if part.strip()}
+    if include - set(INCLUDES):
+        raise QueryError(f"include must be a list of: {', '.join(INCLUDES)}")
+    return include
+
+
+def record_loader_options(include):
+    """Eager loading for single Record lookups, one strategy per relation."""
+    options = []
+    if 'user' in include:
+        # many-to-one, joined into the same SELECT
+        options.append(joinedload(Record.user))
+    if 'notifications' in include:
+        # collection, one extra SELECT ... WHERE record_id IN (...)
+        options.append(selectinload(Record.notifications))
+    return options
+
+
+def expand_records(records, include):
+    """
+    Attach the included relations to serialized records. Each relation is
+    one IN query for the whole page, however many records it holds.
+    """
+    if 'user' in include:
+        user_ids = {r['user_id'] for r in records}
+        users = {}
+        if user_ids:
+            rows = db.session.execute(select(*USER_SUMMARY_COLUMNS).where(User.id.in_(user_ids)))
+            users = {row.id: format_user_summary(row) for row in rows}
+        for record in records:
+            record['user'] = users.get(record['user_id'])
+
+    if 'notifications' in include:
+        by_record = defaultdict(list)
+        record_ids = [r['id'] for r in records]
+        if record_ids:
+            rows = db.session.execute(
+                select(*NOTIFICATION_COLUMNS)
+                .where(Notification.record_id.in_(record_ids))
+                .order_by(Notification.id)
+            )
+            for row in rows:
+                by_record[row.record_id].append(format_notification(row))
+        for record in records:
+            record['notifications'] = by_record[record['id']]
+    return records
+
+
+def is_descending():
+    order = request.args.get('order', 'desc').lower()
+    if order not in ('asc', 'desc'):
+        raise QueryError('order must be asc or desc')
+    return order == 'desc'
+
+
+def paginate_records(query, descending=True):
+    """
+    Page a Record query in the database instead of loading the whole table.
+    Uses LIMIT/OFFSET by default, or keyset paging on (created_at, id)
+    when a `cursor` from a previous response is passed.
+    Rows are fetched as RECORD_COLUMNS tuples, not ORM objects.
+    With `q`, only full-text matches are returned, best first, with a
+    highlighted snippet; these pages are offset based.
+    `include=user,notifications` adds those relations to each record.
+    Raises QueryError on bad paging params.
+    """
+    page = request.args.get('page', 1, type=int)
+    per_page = request.args.get('per_page', 10, type=int)
+    cursor = request.args.get('cursor')
+    include_total = parse_bool(request.args.get('include_total'), True)
+    q = (request.args.get('q') or '').strip()
+    include = parse_include()
+
+    if page < 1:
+        raise QueryError('page must be at least 1')
+    if per_page < 1:
+        raise QueryError('per_page must be at least 1')
+    if q and cursor:
+        raise QueryError('cursor paging is not available with q, use page')
+    per_page = min(per_page, MAX_PER_PAGE)
+
+    columns = RECORD_COLUMNS
+    if q:
+        query, highlight = apply_search(query, q, db.session.connection())
+        columns = RECORD_COLUMNS + (highlight,)
+
+    total = query.order_by(None).count() if include_total else None
+
+    # search results are already ordered by rank
+    if not q:
+        if descending:
+            query = query.order_by(Record.created_at.desc(), Record.id.desc())
+        else:
+            query = query.order_by(Record.created_at.asc(), Record.id.asc())
+
+    if cursor:
+        created_at, record_id = decode_cursor(cursor)
+        if descending:
+            query = query.filter(or_(
+                Record.created_at < created_at,
+                and_(Record.created_at == created_at, Record.id < record_id)
+            ))
+        else:
+            query = query.filter(or_(
+                Record.created_at > created_at,
+                and_(Record.created_at == created_at, Record.id > record_id)
+            ))
+    else:
+        query = query.offset((page - 1) * per_page)
+
+    # fetch one extra row to know if there is a next page
+    rows = query.with_entities(*columns).limit(per_page + 1).all()
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+
+    records = [format_record(r) for r in rows]
+    if q:
+        for record, row in zip(records, rows):
+            record['highlight'] = render_highlight(row.highlight)
+    expand_records(records, include)
+
+    result = {
+        'records': records,
+        'per_page': per_page,
+        'next_cursor': encode_cursor(rows[-1]) if has_more and rows and not q else None,
+    }
+    if not cursor:
+        result['page'] = page
+    if include_total:
+        result['total'] = total
+    return result
+
+
+def version_etag(record_id, version):
+    """ETag of a record without include. It carries the version so that
+    If-Match can be checked in the UPDATE itself, see if_match_versions."""
+    return f'W/"{record_id}-{version}"'
+
+
+def if_match_versions(record_id):
+    """
+    Versions of the record named by If-Match, or None when any version will
+    do (no If-Match or *). Tags for other records or representations match
+    no version.
+    """
+    if_match = request.if_match
+    if not if_match or if_match.star_tag:
+        return None
+    prefix = f'{record_id}-'
+    return {
+        int(tag[len(prefix):]) for tag in if_match.as_set(include_weak=True)
+        if tag.startswith(prefix) and tag[len(prefix):].isdigit()
+    }
+
+
+def record_etag(record, include):
+    """Weak ETag of one record as loaded with record_loader_options(include)."""
+    if not include:
+        return version_etag(record.id, record.version)
+    parts = [record.id, record.version, sorted(include)]
+    if 'notifications' in include:
+        parts.append([n.id for n in record.notifications])
+    return make_etag(*parts)
+
+
+def list_etag(query, scope):
+    """
+    Weak ETag of a list request: count, max(updated_at) and max(id) of the
+    filtered records plus the query params, from one aggregate query.
+    Inserts and deletes change the count or max id, edits move updated_at.
+    """
+    count, last_updated, last_id = query.order_by(None).with_entities(
+        func.count(Record.id), func.max(Record.updated_at), func.max(Record.id)
+    ).one()
+    return make_etag(scope, count, last_updated, last_id, sorted(request.args.items(multi=True)))
+
+
+def record_list_response(query, scope):
+    """
+    Serve a list page with an ETag. Conditional requests (If-None-Match)
+    get list_etag and a 304 before any rows are read when it matches; with
+    RESPONSE_CACHE on, repeated requests are answered from the cache until
+    the next record write. Other requests skip the aggregate, which scans
+    the whole filtered set, and tag the page body instead, so a client's
+    first revalidation answers 200 with the list_etag to send next time.
+    Raises QueryError on bad params.
+    """
+    cache = get_response_cache()
+    key = f'records:{scope}:{request.path}?{urlencode(sorted(request.args.items(multi=True)))}'
+    if cache is not None:
+        generation, cached = cache.lookup(key)
+        if cached is not None:
+            etag, body = cached
+            if not_modified(etag):
+                return not_modified_response(etag, CACHE_HEADERS)
+            return current_app.response_class(
+                body, mimetype='application/json', headers={'ETag': etag, **CACHE_HEADERS})
+
+    etag = None
+    if cache is not None or request.if_none_match:
+        etag = list_etag(query, scope)
+        if not_modified(etag):
+            return not_modified_response(etag, CACHE_HEADERS)
+
+    body = dumps(paginate_records(query, descending=is_descending()))
+    if etag is None:
+        etag = make_etag(scope, body)
+    if cache is not None:
+        cache.store(generation, key, etag, body)
+    return current_app.response_class(body, mimetype='application/json', headers={'ETag': etag, **CACHE_HEADERS})
@@ -1,20 +1,20 @@
 from flask_restful import Resource, reqparse
 from flask import request
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy.orm.exc import StaleDataError
 from models.baseModel import db
-from models.userModel import User
+from auth import is_admin
 from models.recordModel import Record
+from serializers import format_record, format_record_with, json_response
+from etags import not_modified, not_modified_response
+from resources.recordQuery import (
+    CACHE_HEADERS, filter_records, if_match_versions, parse_include, record_etag,
+    record_list_response, record_loader_options, version_etag, QueryError,
+)
 from datetime import datetime, timezone
-import cloudinary
-import cloudinary.uploader
+from uploads import async_uploads_enabled, upload_images, upload_images_async
 
 
-def is_admin(user_id):
-    user = User.query.get(user_id)
-    if (user and user.role == "admin"):
-        return True
-    return False
-
 class RecordResource(Resource):
     parser = reqparse.RequestParser()
     parser.add_argument('type', required=False, help='Type is required')
@@ -31,47 +31,34 @@ class RecordResource(Resource):
         user_id = get_jwt_identity()
         
         if record_id:
-            record = Record.query.get(record_id)
+            try:
+                include = parse_include()
+            except QueryError as e:
+                return {'message': str(e)}, 400
+
+            record = db.session.get(Record, record_id, options=record_loader_options(include))
             if not record:
                 return {'message': 'Record not found'}, 404
             
             if record.user_id != int(user_id) and not is_admin(user_id):
                 return {'message': 'Unauthorized access'}, 403
-                
-            return self.format_record(record)
-        else:
-            page = request.args.get('page', 1, type=int)
-            per_page = min(request.args.get('per_page', 10, type=int), 100)
-            
-        if is_admin(user_id):
-            records = Record.query.all()
-        else:
-            records = Record.query.filter_by(user_id=user_id).all()
 
-            
-            return {
-                'records': [self.format_record(r) for r in records],
-            }
-    
-    def format_record(self, record):
-        return {
-            'id': record.id,
-            'type': record.type,
-            'title': record.title,
-            'description': record.description,
-            # 'location_address': record.location_address,
-            'latitude': record.latitude,
-            'longitude': record.longitude,
-            'images': record.images or '',
-            # 'videos': record.videos or [],
-            'status': record.status,
-            # 'created_by': record.created_by,
-            'created_at': record.created_at.isoformat() if record.created_at else None,
-            'updated_at': record.updated_at.isoformat() if record.updated_at else None,
-            'user_id': record.user_id
-            # 'admin_comment': getattr(record, 'admin_comment', None)
-        }
+            etag = record_etag(record, include)
+            if not_modified(etag):
+                return not_modified_response(etag, CACHE_HEADERS)
+            return json_response(format_record_with(record, include), headers={'ETag': etag, **CACHE_HEADERS})
 
+        admin = is_admin(user_id)
+        if admin:
+            query = Record.query
+        else:
+            query = Record.query.filter_by(user_id=int(user_id))
+
+        try:
+            query = filter_records(query, allow_user_filter=admin)
+            return record_list_response(query, scope='all' if admin else f'user:{user_id}')
+        except QueryError as e:
+            return {'message': str(e)}, 400
 
     # CREATE new record
     @jwt_required()
@@ -94,13 +81,10 @@ class RecordResource(Resource):
                 return {'message': 'Invalid longitude'}, 400
 
 
-            uploaded_files = request.files.getlist('images')
-            image_urls = []
-            for file in uploaded_files:
-                if file:
-                    upload_result = cloudinary.uploader.upload(file)
-                    image_urls.append(upload_result['secure_url'])  # fixed typo here
-                    
+            uploaded_files = [file for file in request.files.getlist('images') if file]
+            async_upload = bool(uploaded_files) and async_uploads_enabled()
+            image_urls = [] if async_upload else upload_images(uploaded_files)
+
             record = Record(
                 type=record_type,
                 title=title,
@@ -108,6 +92,7 @@ class RecordResource(Resource):
                 latitude=latitude,
                 longitude=longitude,
                 images=image_urls,
+                images_status='pending' if async_upload else 'ready',
                 status='pending',
                 user_id=int(user_id),
                 created_at=datetime.now(timezone.utc),
@@ -117,9 +102,12 @@ class RecordResource(Resource):
             db.session.add(record)
             db.session.commit()
 
+            if async_upload:
+                upload_images_async(uploaded_files, record.id)
+
             return {
                 'message': 'Record created successfully',
-                'record': self.format_record(record)
+                'record': format_record(record)
             }, 201
 
         except Exception as e:
@@ -138,6 +126,11 @@ class RecordResource(Resource):
             
         if record.user_id != int(user_id):
             return {'message': 'Unauthorized to edit this record'}, 403
+
+        versions = if_match_versions(record_id)
+        if versions is not None and record.version not in versions:
+            return {'message': 'Record was changed by someone else, reload it and try again'}, 412, \
+                {'ETag': version_etag(record.id, record.version)}
         
         if record.status in ['under investigation', 'rejected', 'resolved']:
             return {'message': 'Cannot edit record with current status'}, 400
@@ -169,22 +162,29 @@ class RecordResource(Resource):
             record.description = description.strip()
 
             # Handle uploaded image files
-            uploaded_files = request.files.getlist('images')
-            if uploaded_files:
-                image_urls = []
-                for file in uploaded_files:
-                    if file:
-                        upload_result = cloudinary.uploader.upload(file)
-                        image_urls.append(upload_result['secure_url'])
-                record.images = image_urls
+            uploaded_files = [file for file in request.files.getlist('images') if file]
+            async_upload = bool(uploaded_files) and async_uploads_enabled()
+            if async_upload:
+                record.images_status = 'pending'
+            elif uploaded_files:
+                record.images = upload_images(uploaded_files)
 
             record.updated_at = datetime.now(timezone.utc)
+            # the UPDATE only matches the version read above (version_id_col)
             db.session.commit()
 
+            if async_upload:
+                upload_images_async(uploaded_files, record.id)
+
             return {
                 'message': 'Record updated successfully',
-                'record': self.format_record(record)
-            }
+                'record': format_record(record)
+            }, 200, {'ETag': version_etag(record.id, record.version)}
+
+        except StaleDataError:
+            db.session.rollback()
+            return {'message': 'Record was changed by someone else, reload it and try again'}, \
+                412 if versions is not None else 409
 
         except Exception as e:
             db.session.rollback()
@@ -201,14 +201,28 @@ class RecordResource(Resource):
             
         if record.user_id != int(user_id):
             return {'message': 'Unauthorized to delete this record'}, 403
+
+        versions = if_match_versions(record_id)
+        if versions is not None and record.version not in versions:
+            return {'message': 'Record was changed by someone else, reload it and try again'}, 412, \
+                {'ETag': version_etag(record.id, record.version)}
         
         if record.status in ['under investigation', 'rejected', 'resolved']:
             return {'message': 'Cannot delete record with current status'}, 400
         
         try:
+            # the DELETE only matches the version read above (version_id_col)
             db.session.delete(record)
             db.session.commit()
             return {'message': 'Record deleted successfully'}
+
+        except StaleDataError:
+            db.session.rollback()
+            current = db.session.get(Record, record_id, populate_existing=True)
+            if current is None:
+                return {'message': 'Record not found'}, 404
+            return {'message': 'Record was changed by someone else, reload it and try again'}, \
+                412 if versions is not None else 409, {'ETag': version_etag(current.id, current.version)}
             
         except Exception as e:
             db.session.rollback()
@@ -2,9 +2,6 @@ from flask import request
 from flask_restful import Resource
 from models.baseModel import db
 from models.userModel import User
-from flask_bcrypt import Bcrypt
-
-bcrypt = Bcrypt()
 
 class SignupResource(Resource):
     def post(self):
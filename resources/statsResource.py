@@ -0,0 +1,19 @@
+from flask import request
+from flask_restful import Resource
+from flask_jwt_extended import jwt_required
+from auth import is_admin
+from stats import read_stats
+
+
+class StatsResource(Resource):
+    # GET /admin/stats?days=30
+    @jwt_required()
+    def get(self):
+        if not is_admin():
+            return {'message': 'Admin access required'}, 403
+
+        days = request.args.get('days', 30, type=int)
+        if not 1 <= days <= 366:
+            return {'message': 'days must be between 1 and 366'}, 400
+
+        return read_stats(days)
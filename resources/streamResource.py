@@ -0,0 +1,88 @@
+import os
+import time
+from datetime import timedelta
+from flask import Response, request, stream_with_context
+from flask_restful import Resource
+from flask_jwt_extended import create_access_token, get_jwt, get_jwt_request_location, jwt_required
+from models.baseModel import db
+from auth import current_user_id, is_admin
+from events import get_broker
+from serializers import dumps
+
+# Comment line sent when idle so proxies don't drop the connection
+HEARTBEAT_SECONDS = float(os.getenv('SSE_HEARTBEAT', 15))
+# Streams end after this long and the browser reconnects with Last-Event-ID,
+# which keeps worker threads from being held forever
+MAX_STREAM_SECONDS = float(os.getenv('SSE_MAX_SECONDS', 300))
+RETRY_MS = 3000
+# Lifetime of the ?jwt= tokens from POST /records/stream/token. They end up in
+# URLs (proxy logs, browser history), so they only open the stream, and only
+# for long enough to connect: an open stream is not cut off when it expires
+STREAM_TOKEN_SECONDS = int(os.getenv('STREAM_TOKEN_SECONDS', 60))
+STREAM_SCOPE = 'stream'
+
+
+def stream_token_allowed(jwt_header, jwt_data):
+    """JWTManager.token_verification_loader: stream tokens open the stream and nothing else."""
+    return jwt_data.get('scope') != STREAM_SCOPE or request.endpoint == 'recordstreamresource'
+
+
+def format_event(event):
+    return b'id: %s\nevent: %s\ndata: %s\n\n' % (
+        event['id'].encode('ascii'), event['event'].encode('ascii'), dumps(event))
+
+
+def event_stream(subscription, user_id, admin):
+    try:
+        yield b'retry: %d\n\n' % RETRY_MS
+        started = last_sent = time.monotonic()
+        while time.monotonic() - started < MAX_STREAM_SECONDS:
+            events, reset = subscription.get(timeout=HEARTBEAT_SECONDS)
+            chunk = []
+            if reset:
+                # events were dropped, refetch GET /records before going on
+                chunk.append(b'event: reset\ndata: {}\n\n')
+            chunk.extend(format_event(e) for e in events if admin or e['user_id'] == user_id)
+            if chunk:
+                yield b''.join(chunk)
+                last_sent = time.monotonic()
+            elif time.monotonic() - last_sent >= HEARTBEAT_SECONDS:
+                yield b': heartbeat\n\n'
+                last_sent = time.monotonic()
+    finally:
+        subscription.close()
+
+
+class RecordStreamResource(Resource):
+    # GET /records/stream: Server-Sent Events for records the caller can see.
+    # EventSource can't set headers, so a stream token may be passed as ?jwt=
+    @jwt_required(locations=['headers', 'query_string'])
+    def get(self):
+        if get_jwt_request_location() == 'query_string' and get_jwt().get('scope') != STREAM_SCOPE:
+            return {'message': 'Pass a token from POST /records/stream/token in ?jwt='}, 401
+
+        user_id = current_user_id()
+        admin = is_admin()
+        last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+        subscription = get_broker().subscribe(last_event_id)
+
+        # hand the pooled connection back, the stream may stay open for minutes
+        db.session.close()
+
+        return Response(
+            stream_with_context(event_stream(subscription, user_id, admin)),
+            mimetype='text/event-stream',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+        )
+
+
+class StreamTokenResource(Resource):
+    # POST /records/stream/token: a short-lived token for GET /records/stream?jwt=
+    @jwt_required()
+    def post(self):
+        token = create_access_token(
+            identity=str(current_user_id()),
+            additional_claims={'scope': STREAM_SCOPE},
+            expires_delta=timedelta(seconds=STREAM_TOKEN_SECONDS),
+        )
+        return {'token': token, 'expires_in': STREAM_TOKEN_SECONDS}
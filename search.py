@@ -0,0 +1,164 @@
+"""
+Full-text search over record titles and descriptions.
+
+Postgres: a trigger-maintained `records.search_vector` tsvector with a GIN index.
+SQLite: an external-content FTS5 table `records_fts` kept in sync by triggers.
+Neither is mapped on the Record model; install_search() creates them.
+"""
+import re
+from html import escape
+from sqlalchemy import Float, Integer, String, event, func, literal_column, text
+from models.recordModel import Record
+
+HIGHLIGHT_START = '<mark>'
+HIGHLIGHT_STOP = '</mark>'
+HIGHLIGHT_MARKERS = re.compile(f'({re.escape(HIGHLIGHT_START)}|{re.escape(HIGHLIGHT_STOP)})')
+
+POSTGRES_INSTALL = [
+    "ALTER TABLE records ADD COLUMN IF NOT EXISTS search_vector tsvector",
+    """
+    CREATE OR REPLACE FUNCTION records_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(NEW.description, '')), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS records_search_vector_trigger ON records",
+    """
+    CREATE TRIGGER records_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, description ON records
+    FOR EACH ROW EXECUTE FUNCTION records_search_vector_update()
+    """,
+    """
+    UPDATE records SET search_vector =
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'B')
+    WHERE search_vector IS NULL
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_records_search_vector ON records USING gin (search_vector)",
+]
+
+POSTGRES_UNINSTALL = [
+    "DROP INDEX IF EXISTS ix_records_search_vector",
+    "DROP TRIGGER IF EXISTS records_search_vector_trigger ON records",
+    "DROP FUNCTION IF EXISTS records_search_vector_update()",
+    "ALTER TABLE records DROP COLUMN IF EXISTS search_vector",
+]
+
+# Note: SQLite drops these triggers if a batch migration recreates `records`;
+# re-run install_search() after such a migration.
+SQLITE_INSTALL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS records_fts
+    USING fts5(title, description, content='records', content_rowid='id')
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS records_fts_insert AFTER INSERT ON records BEGIN
+        INSERT INTO records_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS records_fts_delete AFTER DELETE ON records BEGIN
+        INSERT INTO records_fts(records_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS records_fts_update AFTER UPDATE OF title, description ON records BEGIN
+        INSERT INTO records_fts(records_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO records_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END
+    """,
+    "INSERT INTO records_fts(records_fts) VALUES ('rebuild')",
+]
+
+SQLITE_UNINSTALL = [
+    "DROP TRIGGER IF EXISTS records_fts_update",
+    "DROP TRIGGER IF EXISTS records_fts_delete",
+    "DROP TRIGGER IF EXISTS records_fts_insert",
+    "DROP TABLE IF EXISTS records_fts",
+]
+
+DDL = {
+    'postgresql': (POSTGRES_INSTALL, POSTGRES_UNINSTALL),
+    'sqlite': (SQLITE_INSTALL, SQLITE_UNINSTALL),
+}
+
+
+def install_search(connection):
+    for statement in DDL.get(connection.dialect.name, ([], []))[0]:
+        connection.execute(text(statement))
+
+
+def uninstall_search(connection):
+    for statement in DDL.get(connection.dialect.name, ([], []))[1]:
+        connection.execute(text(statement))
+
+
+@event.listens_for(Record.__table__, 'after_create')
+def create_search_index(target, connection, **kw):
+    # db.create_all() (tests, benchmarks) gets the same index as migrations
+    install_search(connection)
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    """Alembic autogenerate filter: keep the search objects out of diffs."""
+    if type_ == 'table' and name.startswith('records_fts'):
+        return False
+    if type_ == 'column' and name == 'search_vector':
+        return False
+    return True
+
+
+def fts5_query(q):
+    # Quote every term so user input can't hit FTS5 query syntax
+    return ' '.join('"' + term.replace('"', '""') + '"' for term in q.split())
+
+
+def render_highlight(snippet):
+    """
+    HTML for a highlight snippet: the description text escaped, with only the
+    match markers left as tags, so clients can render it as is. A reporter
+    typing the marker strings themselves can fake a highlight, nothing more.
+    """
+    if snippet is None:
+        return None
+    return ''.join(part if part in (HIGHLIGHT_START, HIGHLIGHT_STOP) else escape(part)
+                   for part in HIGHLIGHT_MARKERS.split(snippet))
+
+
+def apply_search(query, q, connection):
+    """
+    Restrict a Record query to matches of `q`, best matches first.
+    Returns (query, highlight column); pass its values through render_highlight.
+    Falls back to ILIKE on other databases.
+    """
+    dialect = connection.dialect.name
+
+    if dialect == 'postgresql':
+        tsquery = func.websearch_to_tsquery('english', q)
+        vector = literal_column('records.search_vector')
+        highlight = func.ts_headline(
+            'english', Record.description, tsquery,
+            f'StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_STOP}, MaxFragments=2'
+        )
+        query = query.filter(vector.op('@@')(tsquery)).order_by(
+            func.ts_rank_cd(vector, tsquery).desc(), Record.id.desc())
+        return query, highlight.label('highlight')
+
+    if dialect == 'sqlite':
+        matches = text(
+            "SELECT rowid AS id, bm25(records_fts) AS rank, "
+            f"snippet(records_fts, 1, '{HIGHLIGHT_START}', '{HIGHLIGHT_STOP}', '...', 16) AS highlight "
+            "FROM records_fts WHERE records_fts MATCH :q"
+        ).bindparams(q=fts5_query(q)).columns(id=Integer, rank=Float, highlight=String).subquery('matches')
+        # bm25: lower is better
+        query = query.join(matches, matches.c.id == Record.id).order_by(matches.c.rank, Record.id.desc())
+        return query, matches.c.highlight
+
+    query = query.filter(Record.description.ilike(f'%{q}%')).order_by(Record.id.desc())
+    return query, Record.description.label('highlight')
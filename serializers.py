@@ -0,0 +1,108 @@
+import json
+from flask import current_app
+from models.recordModel import Record
+from models.userModel import User
+from models.notificationModel import Notification
+
+try:
+    import orjson
+except ImportError:  # optional, falls back to the stdlib encoder
+    orjson = None
+
+# Columns returned by the records API. List endpoints select these as
+# plain row tuples, so no ORM objects are built or tracked per row.
+RECORD_COLUMNS = (
+    Record.id,
+    Record.type,
+    Record.title,
+    Record.description,
+    Record.latitude,
+    Record.longitude,
+    Record.images,
+    Record.images_status,
+    Record.status,
+    Record.created_at,
+    Record.updated_at,
+    Record.user_id,
+    Record.version,
+)
+
+
+def format_record(record):
+    """Serialize a Record or a row of RECORD_COLUMNS."""
+    created_at = record.created_at
+    updated_at = record.updated_at
+    return {
+        'id': record.id,
+        'type': record.type,
+        'title': record.title,
+        'description': record.description,
+        'latitude': record.latitude,
+        'longitude': record.longitude,
+        'images': record.images or [],
+        'images_status': record.images_status,
+        'status': record.status,
+        'created_at': created_at.isoformat() if created_at else None,
+        'updated_at': updated_at.isoformat() if updated_at else None,
+        'user_id': record.user_id,
+        'version': record.version,
+    }
+
+
+# Related rows for ?include=user,notifications
+USER_SUMMARY_COLUMNS = (User.id, User.username, User.first_name, User.last_name, User.email)
+NOTIFICATION_COLUMNS = (
+    Notification.id,
+    Notification.record_id,
+    Notification.user_id,
+    Notification.message,
+    Notification.approved_at,
+    Notification.resolved_at,
+)
+
+
+def format_user_summary(user):
+    return {
+        'id': user.id,
+        'username': user.username,
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+        'email': user.email,
+    }
+
+
+def format_notification(notification):
+    approved_at = notification.approved_at
+    resolved_at = notification.resolved_at
+    return {
+        'id': notification.id,
+        'record_id': notification.record_id,
+        'user_id': notification.user_id,
+        'message': notification.message,
+        'approved_at': approved_at.isoformat() if approved_at else None,
+        'resolved_at': resolved_at.isoformat() if resolved_at else None,
+    }
+
+
+def format_record_with(record, include):
+    """
+    Serialize a Record and the relations named in `include`. Load the record
+    with recordQuery.record_loader_options(include) so this adds no queries.
+    """
+    data = format_record(record)
+    if 'user' in include:
+        data['user'] = format_user_summary(record.user) if record.user else None
+    if 'notifications' in include:
+        data['notifications'] = [format_notification(n) for n in record.notifications]
+    return data
+
+
+def dumps(data):
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, separators=(',', ':')).encode('utf-8')
+
+
+def json_response(data, status=200, headers=None):
+    """Encode a payload directly, bypassing flask_restful's json.dumps."""
+    return current_app.response_class(dumps(data), status=status, headers=headers, mimetype='application/json')
@@ -0,0 +1,159 @@
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import event, func, inspect, or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from models.baseModel import db
+from models.recordModel import Record
+from models.statsModel import RecordStat
+
+stats_table = RecordStat.__table__
+
+UPSERT_DIALECTS = {
+    'postgresql': postgresql.insert,
+    'sqlite': sqlite.insert,
+}
+
+# Record attributes counted by the stats table, by dimension name
+DIMENSIONS = ('status', 'type', 'title')
+
+
+def day_key(created_at):
+    if created_at is None:
+        return None
+    if created_at.tzinfo is not None:
+        created_at = created_at.astimezone(timezone.utc)
+    return created_at.date().isoformat()
+
+
+def record_keys(values):
+    """(dimension, key) pairs a record with these values counts towards."""
+    keys = [('total', '')]
+    keys += [(dim, values[dim]) for dim in DIMENSIONS if values.get(dim) is not None]
+    day = day_key(values.get('created_at'))
+    if day:
+        keys.append(('day', day))
+    return keys
+
+
+def apply_deltas(connection, deltas):
+    """
+    Add each delta to its counter row, creating rows as needed. Rows are
+    written in key order so that concurrent transactions lock the shared
+    counters in the same order (pending -> x against x -> pending would
+    otherwise deadlock on Postgres).
+    """
+    merged = Counter()
+    for key, delta in deltas:
+        merged[key] += delta
+    merged = {key: delta for key, delta in merged.items() if delta}
+
+    upsert = UPSERT_DIALECTS.get(connection.dialect.name)
+    for (dimension, key), delta in sorted(merged.items()):
+        if upsert is not None:
+            stmt = upsert(stats_table).values(dimension=dimension, key=key, count=delta)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[stats_table.c.dimension, stats_table.c.key],
+                set_={'count': stats_table.c.count + stmt.excluded.count},
+            )
+            connection.execute(stmt)
+            continue
+        result = connection.execute(
+            update(stats_table)
+            .where(stats_table.c.dimension == dimension, stats_table.c.key == key)
+            .values(count=stats_table.c.count + delta)
+        )
+        if result.rowcount == 0:
+            connection.execute(stats_table.insert().values(dimension=dimension, key=key, count=delta))
+
+
+def count_inserted(connection, rows):
+    """Counter changes for records inserted without the ORM (bulk import)."""
+    apply_deltas(connection, [(key, 1) for row in rows for key in record_keys(row)])
+
+
+def count_status_changes(connection, old_statuses, new_status):
+    """Counter changes for a bulk status UPDATE that bypasses the ORM."""
+    deltas = []
+    for old_status in old_statuses:
+        if old_status != new_status:
+            deltas += [(('status', old_status), -1), (('status', new_status), 1)]
+    apply_deltas(connection, deltas)
+
+
+def _current_values(target):
+    return {
+        'status': target.status,
+        'type': target.type,
+        'title': target.title,
+        'created_at': target.created_at,
+    }
+
+
+@event.listens_for(Record, 'after_insert')
+def count_insert(mapper, connection, target):
+    apply_deltas(connection, [(key, 1) for key in record_keys(_current_values(target))])
+
+
+@event.listens_for(Record, 'after_delete')
+def count_delete(mapper, connection, target):
+    apply_deltas(connection, [(key, -1) for key in record_keys(_current_values(target))])
+
+
+@event.listens_for(Record, 'after_update')
+def count_update(mapper, connection, target):
+    state = inspect(target)
+    deltas = []
+    for dim in DIMENSIONS:
+        history = state.attrs[dim].history
+        if history.deleted and history.added and history.deleted[0] != history.added[0]:
+            deltas.append(((dim, history.deleted[0]), -1))
+            deltas.append(((dim, history.added[0]), 1))
+    if deltas:
+        apply_deltas(connection, deltas)
+
+
+def rebuild_stats(connection=None):
+    """
+    Recompute every counter from the records table (backfill/repair).
+    Commits the app session unless a connection is passed in.
+    """
+    own_session = connection is None
+    if own_session:
+        connection = db.session.connection()
+    connection.execute(stats_table.delete())
+
+    rows = [{'dimension': 'total', 'key': '', 'count': connection.execute(
+        select(func.count()).select_from(Record.__table__)).scalar()}]
+    for dim in DIMENSIONS:
+        column = Record.__table__.c[dim]
+        rows += [{'dimension': dim, 'key': key, 'count': count} for key, count in connection.execute(
+            select(column, func.count()).group_by(column))]
+
+    days = Counter()
+    for created_at, count in connection.execute(
+            select(func.date(Record.created_at), func.count()).group_by(func.date(Record.created_at))):
+        if created_at is not None:
+            days[str(created_at)[:10]] += count
+    rows += [{'dimension': 'day', 'key': day, 'count': count} for day, count in days.items()]
+
+    connection.execute(stats_table.insert(), rows)
+    if own_session:
+        db.session.commit()
+    return len(rows)
+
+
+def read_stats(days=30):
+    """All counters, with per-day counts for the last `days` days."""
+    cutoff = (datetime.now(timezone.utc).date() - timedelta(days=days - 1)).isoformat()
+    rows = db.session.execute(
+        select(stats_table.c.dimension, stats_table.c.key, stats_table.c.count)
+        .where(or_(stats_table.c.dimension != 'day', stats_table.c.key >= cutoff))
+    )
+    result = {'total': 0, 'by_status': {}, 'by_type': {}, 'by_title': {}, 'by_day': {}}
+    for dimension, key, count in rows:
+        if dimension == 'total':
+            result['total'] = count
+        elif count:
+            result[f'by_{dimension}'][key] = count
+    result['by_day'] = dict(sorted(result['by_day'].items()))
+    return result
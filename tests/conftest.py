@@ -0,0 +1,72 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PASSWORD = 'Password1'
+
+
+@pytest.fixture
+def app(tmp_path):
+    """The API on a throwaway SQLite database, inside an app context."""
+    from app import create_app
+    from auth import role_cache
+    from models.baseModel import db
+
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.db'}",
+        'JWT_SECRET_KEY': 'test-secret-key-of-at-least-32-bytes',
+        'BCRYPT_LOG_ROUNDS': 4,
+    })
+    # user ids repeat from one test database to the next
+    role_cache.clear()
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def create_user(username, role='user'):
+    from models.baseModel import db
+    from models.userModel import User
+
+    user = User(username=username, first_name='Test', last_name='User',
+                email=f'{username}@example.com', role=role)
+    user.set_password(PASSWORD)
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def auth_headers(user):
+    from flask_jwt_extended import create_access_token
+    return {'Authorization': f'Bearer {create_access_token(identity=str(user.id))}'}
+
+
+@pytest.fixture
+def user(app):
+    return create_user('reporter01')
+
+
+@pytest.fixture
+def admin(app):
+    return create_user('adminuser01', role='admin')
+
+
+@pytest.fixture
+def user_headers(user):
+    return auth_headers(user)
+
+
+@pytest.fixture
+def admin_headers(admin):
+    return auth_headers(admin)
@@ -0,0 +1,19 @@
+from models.baseModel import db
+from models.recordModel import Record
+
+
+def test_bulk_import_maps_ids_to_input_rows(client, user_headers):
+    rows = [
+        {'type': 'Red-Flag', 'title': 'corruption', 'description': 'First record text'},
+        {'type': 'Unknown', 'title': 'corruption', 'description': 'Rejected record text'},
+        {'type': 'Intervention', 'title': 'corruption', 'description': 'Third record text'},
+    ]
+
+    response = client.post('/records/bulk', json={'records': rows}, headers=user_headers)
+
+    assert response.status_code == 201, response.get_json()
+    body = response.get_json()
+    assert [e['index'] for e in body['errors']] == [1]
+    assert [c['index'] for c in body['created']] == [0, 2]
+    for created in body['created']:
+        assert db.session.get(Record, created['id']).description == rows[created['index']]['description']
@@ -0,0 +1,34 @@
+from sqlalchemy import event
+
+from models.baseModel import db
+from models.recordModel import Record
+
+
+def list_statements(client, headers):
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        response = client.get('/records?include_total=false', headers=headers)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+    return response, statements
+
+
+def test_list_etag_aggregate_only_runs_for_conditional_requests(client, user, user_headers):
+    db.session.add(Record(type='Red-Flag', title='corruption', description='Test record text',
+                          latitude=-1.28, longitude=36.82, user_id=user.id))
+    db.session.commit()
+
+    first, statements = list_statements(client, user_headers)
+    assert first.status_code == 200 and first.headers['ETag']
+    assert not any('max(' in s for s in statements) and not any('count(' in s for s in statements)
+
+    # the first revalidation hands out the aggregate tag, the next one is a 304
+    second, _ = list_statements(client, {**user_headers, 'If-None-Match': first.headers['ETag']})
+    assert second.status_code == 200
+    third, _ = list_statements(client, {**user_headers, 'If-None-Match': second.headers['ETag']})
+    assert third.status_code == 304
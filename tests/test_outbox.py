@@ -0,0 +1,90 @@
+import socket
+from datetime import timedelta
+
+import pytest
+from aiosmtpd.controller import Controller
+
+from mailer import SMTPMailer, drain_outbox
+from models.baseModel import db
+from models.outboxModel import OutboxEmail, utcnow
+
+
+class Inbox:
+    def __init__(self):
+        self.messages = []
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append(envelope)
+        return '250 OK'
+
+
+class FailingMailer:
+    def send(self, recipient, subject, body):
+        raise OSError('connection refused')
+
+    def close(self):
+        pass
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_server():
+    inbox = Inbox()
+    controller = Controller(inbox, hostname='127.0.0.1', port=free_port())
+    controller.start()
+    yield controller, inbox
+    controller.stop()
+
+
+def queue_email():
+    email = OutboxEmail.queue('reporter@example.com', 'Status Update', 'Your record was resolved')
+    db.session.commit()
+    return email.id
+
+
+def test_outbox_sends_through_smtp(app, smtp_server):
+    controller, inbox = smtp_server
+    email_id = queue_email()
+
+    mailer = SMTPMailer(controller.hostname, controller.port, sender='noreply@example.com',
+                        use_tls=False, rate_per_sec=0)
+    try:
+        assert drain_outbox(mailer) == 1
+    finally:
+        mailer.close()
+
+    assert [m.rcpt_tos for m in inbox.messages] == [['reporter@example.com']]
+    email = db.session.get(OutboxEmail, email_id)
+    assert email.status == 'sent' and email.attempts == 1 and email.sent_at is not None
+
+
+def test_failed_send_is_retried_with_backoff(app):
+    email_id = queue_email()
+
+    assert drain_outbox(FailingMailer()) == 0
+    email = db.session.get(OutboxEmail, email_id)
+    assert email.status == 'pending' and email.attempts == 1
+    assert email.last_error == 'connection refused'
+    assert email.next_attempt_at > utcnow() + timedelta(seconds=20)
+
+    # not due again until the backoff has passed
+    assert drain_outbox(FailingMailer()) == 0
+    db.session.refresh(email)
+    assert email.attempts == 1
+
+
+def test_email_is_dead_lettered_after_max_attempts(app):
+    email_id = queue_email()
+
+    for attempt in range(3):
+        db.session.execute(db.update(OutboxEmail).values(next_attempt_at=utcnow()))
+        db.session.commit()
+        drain_outbox(FailingMailer(), max_attempts=3)
+
+    email = db.session.get(OutboxEmail, email_id)
+    assert email.status == 'dead' and email.attempts == 3
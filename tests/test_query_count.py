@@ -0,0 +1,62 @@
+from datetime import datetime, timedelta, timezone
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+
+from models.baseModel import db
+from models.notificationModel import Notification
+from models.recordModel import Record
+from models.userModel import User
+
+N = 5
+URL = '/records?per_page=100&include=user,notifications'
+
+
+def seed(start, count):
+    # one reporter per record so user loading cannot hide behind the identity map
+    now = datetime.now(timezone.utc)
+    for i in range(start, start + count):
+        user = User(username=f'reporter{i:04}', first_name='Test', last_name='User',
+                    email=f'reporter{i}@example.com', role='admin' if i == 0 else 'user')
+        user.password = 'x'
+        db.session.add(user)
+        db.session.flush()
+        record = Record(type='Red-Flag', title='corruption', description='Test record text',
+                        latitude=-1.28, longitude=36.82, user_id=user.id,
+                        created_at=now - timedelta(minutes=i))
+        db.session.add(record)
+        db.session.flush()
+        for n in range(2):
+            db.session.add(Notification(message=f'Update {n}', user_id=user.id, record_id=record.id))
+    db.session.commit()
+
+
+def count_statements(client, headers, records):
+    statements = []
+
+    def count(*args):
+        statements.append(args[2])
+
+    db.session.remove()
+    event.listen(db.engine, 'before_cursor_execute', count)
+    try:
+        response = client.get(URL, headers=headers)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', count)
+
+    assert response.status_code == 200, response.get_data(as_text=True)
+    assert len(response.get_json()['records']) == records
+    return statements
+
+
+def test_include_does_not_grow_with_page_size(app, client):
+    seed(0, N)
+    headers = {'Authorization': f'Bearer {create_access_token(identity="1")}'}
+    # warm the role cache so both requests do the same lookups
+    client.get('/records?per_page=1', headers=headers)
+
+    small = count_statements(client, headers, N)
+    seed(N, 4 * N)
+    large = count_statements(client, headers, 5 * N)
+
+    assert len(small) == len(large), large
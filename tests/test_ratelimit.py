@@ -0,0 +1,60 @@
+import pytest
+
+from conftest import PASSWORD
+from ratelimit import MemoryStore, RateLimiter, RedisStore, login_limiter
+
+
+class FakeRedis:
+    """The redis-py calls RedisStore makes, kept in a dict."""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def incr(self, key):
+        self.data[key] = self.data.get(key, 0) + 1
+        return self.data[key]
+
+    def decr(self, key):
+        self.data[key] = self.data.get(key, 0) - 1
+        return self.data[key]
+
+    def expire(self, key, seconds):
+        pass
+
+
+@pytest.fixture
+def limits(monkeypatch):
+    # a fresh store per test, 3 failed attempts per account
+    monkeypatch.setattr(login_limiter, 'store', MemoryStore())
+    monkeypatch.setattr(login_limiter, 'limits', {'ip': (100, 60), 'email': (3, 300)})
+
+
+def login(client, user, password):
+    return client.post('/login', json={'email': user.email, 'password': password})
+
+
+def test_failed_logins_are_rejected_with_retry_after(client, user, limits):
+    assert [login(client, user, 'Wrong1234').status_code for _ in range(3)] == [401, 401, 401]
+
+    response = login(client, user, PASSWORD)
+
+    assert response.status_code == 429
+    assert 0 < int(response.headers['Retry-After']) <= 300
+
+
+def test_successful_login_does_not_count_against_the_account(client, user, limits):
+    assert [login(client, user, PASSWORD).status_code for _ in range(5)] == [200] * 5
+    assert [login(client, user, 'Wrong1234').status_code for _ in range(4)] == [401, 401, 401, 429]
+
+
+def test_redis_store_lets_exactly_the_limit_through():
+    limiter = RateLimiter(RedisStore(FakeRedis()), {'ip': (2, 60)})
+
+    results = [limiter.hit(ip='10.0.0.1') for _ in range(4)]
+
+    assert results[:2] == [None, None] and all(results[2:])
+    assert limiter.hit(ip='10.0.0.2') is None
+    assert limiter.counters() == {'allowed': 3, 'rejected': 2, 'ip_rejected': 2}
@@ -0,0 +1,17 @@
+from models.baseModel import db
+from models.recordModel import Record
+
+
+def test_highlight_escapes_the_description(client, user, user_headers):
+    db.session.add(Record(type='Red-Flag', title='corruption', latitude=-1.28, longitude=36.82,
+                          description='Bribe paid <script>alert(1)</script> at the <b>office</b>',
+                          user_id=user.id))
+    db.session.commit()
+
+    response = client.get('/records?q=bribe', headers=user_headers)
+
+    assert response.status_code == 200, response.get_json()
+    [record] = response.get_json()['records']
+    assert record['highlight'] == (
+        '<mark>Bribe</mark> paid &lt;script&gt;alert(1)&lt;/script&gt; at the &lt;b&gt;office&lt;/b&gt;'
+    )
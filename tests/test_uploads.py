@@ -0,0 +1,88 @@
+import io
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import uploads
+from models.baseModel import db
+from models.recordModel import Record
+from uploads import LocalStorage
+
+
+@pytest.fixture
+def storage(tmp_path):
+    storage = LocalStorage(str(tmp_path / 'uploads'), base_url='/uploads/')
+    uploads.set_storage(storage)
+    yield storage
+    uploads.set_storage(None)
+
+
+def record_form(*images):
+    return {
+        'type': 'Red-Flag', 'title': 'corruption', 'description': 'Test record text',
+        'latitude': '-1.28', 'longitude': '36.82',
+        'images': [(io.BytesIO(content), name) for name, content in images],
+    }
+
+
+def stored(storage, url):
+    with open(f"{storage.directory}/{url.rsplit('/', 1)[1]}", 'rb') as f:
+        return f.read()
+
+
+def test_local_storage_copies_the_file(storage, tmp_path):
+    path = tmp_path / 'photo.jpg'
+    path.write_bytes(b'jpeg bytes')
+
+    url = storage.upload(str(path))
+
+    assert url.startswith('/uploads/') and url.endswith('.jpg')
+    assert stored(storage, url) == b'jpeg bytes'
+
+
+def test_images_are_uploaded_in_request_order(client, user_headers, storage):
+    images = [(f'photo{i}.jpg', f'image {i}'.encode()) for i in range(5)]
+
+    response = client.post('/records', data=record_form(*images), headers=user_headers,
+                           content_type='multipart/form-data')
+
+    assert response.status_code == 201, response.get_json()
+    record = response.get_json()['record']
+    assert record['images_status'] == 'ready'
+    assert [stored(storage, url) for url in record['images']] == [content for _, content in images]
+
+
+def test_async_upload_goes_from_pending_to_ready(client, user_headers, storage, monkeypatch):
+    monkeypatch.setenv('ASYNC_UPLOADS', 'true')
+
+    response = client.post('/records', data=record_form(('photo.jpg', b'jpeg bytes')),
+                           headers=user_headers, content_type='multipart/form-data')
+
+    assert response.status_code == 201, response.get_json()
+    record = response.get_json()['record']
+    assert record['images_status'] == 'pending' and record['images'] == []
+
+    deadline = time.monotonic() + 5
+    while True:
+        db.session.rollback()
+        saved = db.session.get(Record, record['id'], populate_existing=True)
+        if saved.images_status != 'pending' or time.monotonic() > deadline:
+            break
+        time.sleep(0.02)
+
+    assert saved.images_status == 'ready'
+    assert [stored(storage, url) for url in saved.images] == [b'jpeg bytes']
+
+
+def test_sweep_fails_uploads_lost_with_their_worker(user):
+    long_ago = datetime.now(timezone.utc) - timedelta(hours=2)
+    lost = Record(type='Red-Flag', title='corruption', description='Test record text', latitude=-1.28,
+                  longitude=36.82, user_id=user.id, images_status='pending', updated_at=long_ago)
+    recent = Record(type='Red-Flag', title='corruption', description='Test record text', latitude=-1.28,
+                    longitude=36.82, user_id=user.id, images_status='pending')
+    db.session.add_all([lost, recent])
+    db.session.commit()
+
+    assert uploads.fail_stale_uploads(stale_seconds=3600) == 1
+    assert (lost.images_status, recent.images_status) == ('failed', 'pending')
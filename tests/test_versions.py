@@ -0,0 +1,83 @@
+import pytest
+from sqlalchemy import event, update
+from sqlalchemy.orm import Session
+
+from models.baseModel import db
+from models.recordModel import Record
+
+EDIT = {'type': 'Red-Flag', 'title': 'bribery', 'description': 'Edited record text',
+        'latitude': '-1.28', 'longitude': '36.82'}
+
+
+@pytest.fixture
+def record(user):
+    record = Record(type='Red-Flag', title='corruption', description='Test record text',
+                    latitude=-1.28, longitude=36.82, user_id=user.id)
+    db.session.add(record)
+    db.session.commit()
+    return record
+
+
+def etag(record_id, version):
+    return f'W/"{record_id}-{version}"'
+
+
+@pytest.fixture
+def concurrent_edit(record):
+    """Bump the record's version from another connection just before the request's flush."""
+    def bump(session, flush_context, instances):
+        with db.engine.begin() as connection:
+            connection.execute(update(Record.__table__).where(Record.__table__.c.id == record.id)
+                               .values(version=Record.__table__.c.version + 1))
+
+    event.listen(Session, 'before_flush', bump, once=True)
+    yield
+    if event.contains(Session, 'before_flush', bump):
+        event.remove(Session, 'before_flush', bump)
+
+
+def test_put_with_a_stale_if_match_answers_412(client, user_headers, record):
+    response = client.put(f'/records/{record.id}', data=EDIT,
+                          headers={**user_headers, 'If-Match': etag(record.id, 99)})
+
+    assert response.status_code == 412
+    assert response.headers['ETag'] == etag(record.id, 1)
+
+
+def test_put_racing_another_write_answers_409(client, user_headers, record, concurrent_edit):
+    response = client.put(f'/records/{record.id}', data=EDIT, headers=user_headers)
+
+    assert response.status_code == 409
+    db.session.refresh(record)
+    assert record.title == 'corruption'
+
+
+def test_delete_racing_another_write_answers_409(client, user_headers, record, concurrent_edit):
+    response = client.delete(f'/records/{record.id}', headers=user_headers)
+
+    assert response.status_code == 409
+    assert response.headers['ETag'] == etag(record.id, 2)
+    assert db.session.get(Record, record.id) is not None
+
+
+def test_status_change_with_a_stale_if_match_answers_412(client, admin_headers, record):
+    response = client.patch(f'/admin/records/{record.id}', json={'status': 'resolved'},
+                            headers={**admin_headers, 'If-Match': etag(record.id, 99)})
+
+    assert response.status_code == 412
+    assert response.headers['ETag'] == etag(record.id, 1)
+
+
+def test_resolved_record_can_only_be_reopened_as_under_investigation(client, admin_headers, record):
+    def move(status):
+        return client.patch(f'/admin/records/{record.id}', json={'status': status}, headers=admin_headers)
+
+    assert move('resolved').status_code == 200
+
+    refused = move('pending')
+    assert refused.status_code == 409
+    assert refused.get_json()['message'] == 'Cannot change status from resolved to pending'
+
+    allowed = move('under investigation')
+    assert allowed.status_code == 200
+    assert allowed.get_json()['record']['version'] == 3
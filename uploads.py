@@ -0,0 +1,200 @@
+import os
+import uuid
+import shutil
+import logging
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app
+from metrics import timed
+
+logger = logging.getLogger(__name__)
+
+# Files above this size go through cloudinary's chunked upload
+LARGE_FILE_BYTES = 20 * 1024 * 1024
+# Background uploads live in the worker's thread pool; a record still pending
+# after this long lost its uploads with the worker (see fail_stale_uploads)
+STALE_SECONDS = int(os.getenv('UPLOAD_STALE_SECONDS', 3600))
+
+
+class CloudinaryStorage:
+    def __init__(self):
+        # imported here so processes that never upload don't pay for it
+        import cloudinary
+        cloudinary.config(
+            cloud_name=os.getenv('CLOUDINARY_CLOUD_NAME'),
+            api_key=os.getenv('CLOUDINARY_API_KEY'),
+            api_secret=os.getenv('CLOUDINARY_API_SECRET')
+        )
+
+    def upload(self, path):
+        import cloudinary.uploader
+        if os.path.getsize(path) > LARGE_FILE_BYTES:
+            with timed('cloudinary', 'upload_large'):
+                result = cloudinary.uploader.upload_large(path)
+        else:
+            with timed('cloudinary', 'upload'):
+                result = cloudinary.uploader.upload(path)
+        return result['secure_url']
+
+
+class LocalStorage:
+    """Copies uploads into a directory, for local development and testing."""
+
+    def __init__(self, directory=None, base_url=None):
+        self.directory = directory or os.getenv('UPLOAD_DIR', 'uploads')
+        self.base_url = base_url or os.getenv('UPLOAD_BASE_URL', '/uploads/')
+        os.makedirs(self.directory, exist_ok=True)
+
+    def upload(self, path):
+        name = uuid.uuid4().hex + os.path.splitext(path)[1]
+        with open(path, 'rb') as src, open(os.path.join(self.directory, name), 'wb') as dst:
+            shutil.copyfileobj(src, dst)
+        return self.base_url.rstrip('/') + '/' + name
+
+
+STORAGE_BACKENDS = {
+    'cloudinary': CloudinaryStorage,
+    'local': LocalStorage,
+}
+
+_storage = None
+_executor = None
+_lock = threading.Lock()
+
+
+def get_storage():
+    global _storage
+    if _storage is None:
+        backend = os.getenv('UPLOAD_BACKEND', 'cloudinary')
+        if backend not in STORAGE_BACKENDS:
+            raise ValueError(f"Unknown UPLOAD_BACKEND: {backend}")
+        _storage = STORAGE_BACKENDS[backend]()
+    return _storage
+
+
+def set_storage(storage):
+    """Swap the storage backend, e.g. a LocalStorage in tests."""
+    global _storage
+    _storage = storage
+
+
+def get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            workers = int(os.getenv('UPLOAD_WORKERS', 4))
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='upload')
+    return _executor
+
+
+def async_uploads_enabled():
+    return os.getenv('ASYNC_UPLOADS', 'false').lower() in ('1', 'true', 'yes')
+
+
+def spool(files):
+    """
+    Write each uploaded file to its own temp file. FileStorage.save copies
+    in chunks, so large files are never held in memory.
+    """
+    paths = []
+    for file in files:
+        suffix = os.path.splitext(file.filename or '')[1]
+        fd, path = tempfile.mkstemp(prefix='jiseti-upload-', suffix=suffix)
+        os.close(fd)
+        file.save(path)
+        paths.append(path)
+    return paths
+
+
+def _upload_and_remove(storage, path):
+    try:
+        return storage.upload(path)
+    finally:
+        os.remove(path)
+
+
+def upload_images(files):
+    """Upload files concurrently and return their URLs in the original order."""
+    if not files:
+        return []
+    storage = get_storage()
+    paths = spool(files)
+    futures = [get_executor().submit(_upload_and_remove, storage, path) for path in paths]
+    return [future.result() for future in futures]
+
+
+def upload_images_async(files, record_id):
+    """
+    Upload files in the background and store the URLs on the record once
+    all of them are done. The record should already be committed with
+    images_status='pending'.
+    """
+    app = current_app._get_current_object()
+    storage = get_storage()
+    paths = spool(files)
+    futures = [get_executor().submit(_upload_and_remove, storage, path) for path in paths]
+
+    remaining = [len(futures)]
+    remaining_lock = threading.Lock()
+
+    def on_done(_):
+        with remaining_lock:
+            remaining[0] -= 1
+            if remaining[0]:
+                return
+        _finish(app, record_id, futures)
+
+    for future in futures:
+        future.add_done_callback(on_done)
+
+
+def _finish(app, record_id, futures):
+    from sqlalchemy.orm.exc import StaleDataError
+    from models.baseModel import db
+    from models.recordModel import Record
+
+    try:
+        images, images_status = [future.result() for future in futures], 'ready'
+    except Exception as e:
+        logger.error(f"Image upload failed for record {record_id}: {e}")
+        images, images_status = None, 'failed'
+
+    with app.app_context():
+        # the record may be edited meanwhile, retry on a version conflict
+        for _ in range(3):
+            record = db.session.get(Record, record_id, populate_existing=True)
+            if record is None:
+                # deleted while uploading
+                return
+            if images is not None:
+                record.images = images
+            record.images_status = images_status
+            try:
+                db.session.commit()
+                return
+            except StaleDataError:
+                db.session.rollback()
+        logger.error(f"Could not save the images of record {record_id}: it kept changing")
+
+
+def fail_stale_uploads(stale_seconds=STALE_SECONDS):
+    """
+    Mark records whose background uploads were lost (the worker died or was
+    recycled mid-upload) as images_status='failed', so clients stop waiting
+    and can upload again. Run at startup (gunicorn.conf.py) or with
+    `flask uploads-sweep`. Returns the number of records marked.
+    """
+    from datetime import datetime, timedelta, timezone
+    from models.baseModel import db
+    from models.recordModel import Record
+
+    cutoff = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(seconds=stale_seconds)
+    # through the ORM so the change is versioned, audited and broadcast
+    records = Record.query.filter(Record.images_status == 'pending', Record.updated_at < cutoff).all()
+    for record in records:
+        logger.warning(f"Images of record {record.id} were still pending after {stale_seconds}s, marking them failed")
+        record.images_status = 'failed'
+    db.session.commit()
+    return len(records)